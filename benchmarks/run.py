@@ -0,0 +1,252 @@
+"""
+benchmark suite for the dashboard callbacks.
+
+posts the requests the browser sends to /_dash-update-component through the flask test client, against the
+callbacks the app actually registered: a year change for every year in list_tahun and, when the line chart is
+drawn by the server (CLIENTSIDE_HOVER=0), a hover over every province. it reports p50/p95 latency of the whole
+request, json bytes per output (patches count as sent, no_update outputs as skipped), peak python memory of
+a full pass, and the time to import src/app.py in a fresh interpreter.
+
+    python benchmarks/run.py                              # writes benchmarks/results/<commit>.json
+    python benchmarks/run.py --compare benchmarks/results/<other commit>.json
+
+"cold" clears the figure cache before every call (the cost of building the figures),
+"cached" is the same calls served from a warm in-process cache. the shared file cache is disabled.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+## the app reads its data with paths relative to src, like `gunicorn --chdir src`
+os.environ["SHARED_CACHE_DIR"] = ""
+os.chdir(SRC)
+sys.path.insert(0, SRC)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(q / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def summarize(seconds):
+    return {
+        "n": len(seconds),
+        "p50_ms": round(percentile(seconds, 50) * 1000, 3),
+        "p95_ms": round(percentile(seconds, 95) * 1000, 3),
+        "max_ms": round(max(seconds) * 1000, 3),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def bench_cold_import(repeat):
+    """
+    import app in a fresh interpreter `repeat` times, returning the wall times and the app's own startup phases.
+    """
+    code = "import json, time; t = time.perf_counter(); import app; " \
+           "print(json.dumps({'seconds': time.perf_counter() - t, 'phases': app.startup_timings}))"
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], cwd=SRC, capture_output=True, text=True, check=True,
+                                env=dict(os.environ, SHARED_CACHE_DIR=""))
+        runs.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    result = summarize([run["seconds"] for run in runs])
+    result["phases_ms"] = {name: round(seconds * 1000, 3) for name, seconds in runs[-1]["phases"].items()}
+    return result
+
+
+def layout_values(app):
+    """
+    the initial value of every (component id, property) in the layout, like the browser starts with.
+    """
+    components = {}
+    for component in app.serve_layout()._traverse():
+        component_id = getattr(component, "id", None)
+        if component_id is not None:
+            components[component_id] = component
+    return {(component_id, prop): getattr(component, prop, None) for component_id, component in components.items()
+            for prop in component._prop_names}
+
+
+def parse_outputs(output):
+    """
+    the outputs of a callback_map key, "id.prop" or "..id.prop...id.prop.." for several outputs.
+    """
+    outputs = [dict(zip(("id", "property"), part.rsplit(".", 1))) for part in output.strip(".").split("...")]
+    return outputs if output.startswith("..") else outputs[0]
+
+
+def output_ids(output):
+    return [part.rsplit(".", 1)[0] for part in output.strip(".").split("...")]
+
+
+def callback_calls(app):
+    """
+    the (output, inputs, changed input) of every request a pass sends: a year change for every year through
+    every server callback that reads the year dropdown, and a hover over every province through the server
+    line chart callback when there is one.
+    """
+    values = layout_values(app)
+    callbacks = {output: spec for output, spec in app.app.callback_map.items() if "callback" in spec}
+
+    def call(output, changed, value):
+        inputs = [{**item, "value": value if (item["id"], item["property"]) == changed else values.get((item["id"], item["property"]))}
+                  for item in callbacks[output]["inputs"]]
+        return output, inputs, changed
+
+    calls = []
+    for output, spec in callbacks.items():
+        prop_ids = [(item["id"], item["property"]) for item in spec["inputs"]]
+        if ("year-dropdown", "value") in prop_ids:
+            calls += [call(output, ("year-dropdown", "value"), year) for year in app.list_tahun]
+        if output == "line-graph.figure":
+            calls += [call(output, prop_ids[0], {"points": [{"location": province}]}) for province in sorted(app.province_names)]
+    return calls
+
+
+def dash_client(app):
+    """
+    a test client of the dash server, with dash's one-off setup of the first request already done.
+    """
+    client = app.app.server.test_client()
+    client.get("/_dash-layout")
+    return client
+
+
+def post_callback(client, output, inputs, changed):
+    """
+    send one callback request and return the json bytes of every output in the answer.
+    """
+    from plotly.io.json import to_json_plotly
+
+    body = {"output": output, "outputs": parse_outputs(output), "inputs": inputs, "state": [],
+            "changedPropIds": [".".join(changed)]}
+    ## encoded like dash encodes the layout, so numpy values (the years) go out as plain json
+    response = client.post("/_dash-update-component", data=to_json_plotly(body), content_type="application/json")
+    if response.status_code == 204:
+        return {}
+    if response.status_code != 200:
+        raise RuntimeError(f"{output} answered {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    answer = json.loads(response.get_data())["response"]
+    return {component_id: len(json.dumps(props, separators=(",", ":")).encode()) for component_id, props in answer.items()}
+
+
+def bench_callbacks(app, repeat, cold):
+    """
+    post every callback request of a pass `repeat` times.
+    """
+    client = dash_client(app)
+    calls = callback_calls(app)
+    outputs = {name for output, _, _ in calls for name in output_ids(output)}
+
+    if not cold:
+        for call in calls:
+            post_callback(client, *call)
+
+    seconds = []
+    payload = {name: [] for name in sorted(outputs)}
+    skipped = {name: 0 for name in payload}
+    for _ in range(repeat):
+        for call in calls:
+            if cold:
+                app.figure_cache.clear()
+            start = time.perf_counter()
+            sizes = post_callback(client, *call)
+            seconds.append(time.perf_counter() - start)
+            for name in sizes:
+                payload[name].append(sizes[name])
+            for name in output_ids(call[0]):
+                if name not in sizes:
+                    skipped[name] += 1
+
+    result = summarize(seconds)
+    result["json_bytes"] = {name: {"p50": int(percentile(sizes, 50)), "max": max(sizes), "sent": len(sizes),
+                                   "no_update": skipped[name]} for name, sizes in payload.items() if sizes}
+    return result
+
+
+def bench_peak_memory(app):
+    """
+    peak traced python memory of one cold pass over every callback request.
+    """
+    client = dash_client(app)
+    calls = callback_calls(app)
+    app.figure_cache.clear()
+    tracemalloc.start()
+    for call in calls:
+        post_callback(client, *call)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"peak_mb": round(peak / 1024 / 1024, 2)}
+
+
+def compare(current, previous):
+    """
+    print p50 changes between two result files.
+    """
+    print(f"\ncompared with {previous['commit']}:")
+    for section in ("cold_import", "callbacks_cold", "callbacks_cached"):
+        old, new = previous.get(section, {}).get("p50_ms"), current[section]["p50_ms"]
+        if old:
+            print(f"  {section:<18} p50 {old:>10.3f} ms -> {new:>10.3f} ms ({(new - old) / old * 100:+.1f}%)")
+    for name, sizes in current["callbacks_cold"]["json_bytes"].items():
+        old = previous.get("callbacks_cold", {}).get("json_bytes", {}).get(name, {}).get("p50")
+        if old:
+            print(f"  {name + ' bytes':<18} p50 {old:>10} -> {sizes['p50']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark callback latency, payload size and startup time")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over every year and province")
+    parser.add_argument("--import-repeat", type=int, default=3, help="fresh interpreters for the cold import")
+    parser.add_argument("--output", help="result file, default benchmarks/results/<commit>.json")
+    parser.add_argument("--compare", help="previous result file to compare with")
+    args = parser.parse_args()
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "cold_import": bench_cold_import(args.import_repeat),
+    }
+
+    import app
+    import instrumentation
+    results["settings"] = {
+        "MAP_DETAIL": app.MAP_DETAIL, "CLIENTSIDE_HOVER": app.CLIENTSIDE_HOVER, "INSTRUMENTATION": instrumentation.ENABLED,
+    }
+    results["callbacks_cold"] = bench_callbacks(app, args.repeat, cold=True)
+    results["callbacks_cached"] = bench_callbacks(app, args.repeat, cold=False)
+    results["memory"] = bench_peak_memory(app)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(json.dumps(results, indent=2))
+    print(f"\nsaved to {os.path.relpath(output, ROOT)}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
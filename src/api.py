@@ -0,0 +1,286 @@
+"""
+json api over the minimum wage dataset, served by the dashboard's flask server.
+
+    GET  /api/v1/provinces                      every province with its regional and years
+    GET  /api/v1/regions                        every regional with its provinces
+    GET  /api/v1/provinces/<province>           every year of one province
+    GET  /api/v1/years/<year>                   every province in one year
+    GET  /api/v1/ump?province=..&region=..&year=..&from=..&to=..
+    POST /api/v1/batch  {"queries": [{"province": [..], "year": [..], ...}, ...]}
+    GET  /api/v1/stats?column=..&region=..&year=..&from=..&to=..
+
+in /api/v1/ump and in batch queries every filter is optional: province, region and year take one or more values
+(repeated or comma separated), from and to bound the years. rows come back sorted by province and year.
+
+/api/v1/stats returns the precomputed per-year statistics of one column (UpahMinimumProvinsi by default) for
+"Indonesia" (the default) and/or regionals, read from the store's summaries (see summaries.py).
+
+lookups go through precomputed indexes: the row range of every province in the province-sorted arrays
+(see datastore.UMPStore) and a binary search over the sorted years inside it. the data only changes on deploy,
+so GET answers are cacheable for max_age seconds and carry an ETag (see compression.py).
+"""
+
+import json
+
+import numpy as np
+from flask import Blueprint, Response, request
+
+from cache import FigureCache
+from summaries import NATIONAL, STATISTICS, SUMMARY_COLUMNS
+
+
+## columns returned for every row, in order, after the store's key and label columns (Provinsi, NamaProvinsi)
+API_COLUMNS = ["Regional", "Tahun", "UpahMinimumProvinsi", "KenaikanUMP", "PersentaseKenaikan"]
+
+MAX_BATCH_QUERIES = 100
+
+
+class QueryError(ValueError):
+    """
+    raised for a query the api can't answer, returned to the client as a 400 (or 404 for a path parameter).
+    """
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class UMPIndex:
+    """
+    the dataset as plain arrays sorted by province and year, with the indexes the api queries use.
+    provinces are the values of the store's key column.
+    """
+
+    def __init__(self, store):
+        df = store.by_province
+        self.key = store.key
+        self.column_names = list(dict.fromkeys([store.key, store.label] + API_COLUMNS))
+        self.columns = {column: df[column].to_numpy() for column in self.column_names}
+        self.years = self.columns["Tahun"].astype(int)
+        self.province_index = store.province_index
+        self.provinces = store.provinces
+        self.all_years = [int(year) for year in store.years]
+
+        regional = dict(zip(self.columns[store.key], self.columns["Regional"]))
+        self.region_index = {}
+        for province_name in self.provinces:
+            self.region_index.setdefault(regional[province_name], []).append(province_name)
+        self.regional = regional
+
+    def rows(self, provinces=None, regions=None, years=None, year_from=None, year_to=None):
+        """
+        this function will return the row numbers matching every given filter, sorted by province and year.
+        """
+        selected = self.select_provinces(provinces, regions)
+        low = -np.inf if year_from is None else year_from
+        high = np.inf if year_to is None else year_to
+
+        parts = []
+        for province_name in selected:
+            start, stop = self.province_index[province_name]
+            ## years are sorted inside a province, so the range is two binary searches
+            first = start + np.searchsorted(self.years[start:stop], low, side="left")
+            last = start + np.searchsorted(self.years[start:stop], high, side="right")
+            rows = np.arange(first, last)
+            if years is not None:
+                rows = rows[np.isin(self.years[rows], years)]
+            parts.append(rows)
+        return np.concatenate(parts) if parts else np.array([], dtype=int)
+
+    def select_provinces(self, provinces=None, regions=None):
+        selected = list(self.provinces) if provinces is None else sorted(set(provinces))
+        unknown = [province_name for province_name in selected if province_name not in self.province_index]
+        if unknown:
+            raise QueryError(f"unknown province {unknown}, see /api/v1/provinces")
+
+        if regions is not None:
+            unknown = [region for region in regions if region not in self.region_index]
+            if unknown:
+                raise QueryError(f"unknown region {unknown}, see /api/v1/regions")
+            in_regions = {province_name for region in regions for province_name in self.region_index[region]}
+            selected = [province_name for province_name in selected if province_name in in_regions]
+        return selected
+
+    def records(self, rows):
+        """
+        this function will return the rows as a list of dicts, missing values as None.
+        """
+        values = {}
+        for column in self.column_names:
+            column_values = self.columns[column][rows]
+            if column_values.dtype.kind == "f":
+                values[column] = [None if np.isnan(value) else float(value) for value in column_values]
+            elif column_values.dtype.kind in "iu":
+                values[column] = column_values.tolist()
+            else:
+                values[column] = [str(value) for value in column_values]
+        return [dict(zip(self.column_names, row)) for row in zip(*(values[column] for column in self.column_names))]
+
+
+def parse_list(values, name, kinds=(str,)):
+    """
+    this function will turn repeated and comma separated parameters into one list, or None when none were given.
+    every value must be one of kinds (a batch query is arbitrary json).
+    """
+    if values is None:
+        return None
+    if not isinstance(values, list):
+        values = [values]
+    for value in values:
+        if isinstance(value, bool) or not isinstance(value, kinds):
+            raise QueryError(f"{name} must be a value or a list of values, got {value!r}")
+    items = [item.strip() if isinstance(item, str) else item for value in values
+             for item in (value.split(",") if isinstance(value, str) else [value])]
+    items = [item for item in items if item != ""]
+    return items or None
+
+
+def parse_year(value, name="year"):
+    """
+    this function will return a year given as an int or a numeric string.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+        return int(value)
+    raise QueryError(f"{name} must be a year, got {value!r}")
+
+
+def normalize_query(params):
+    """
+    this function will validate a query (query string or batch item) and return it in a canonical, hashable form.
+    """
+    unknown = set(params) - {"province", "region", "year", "from", "to"}
+    if unknown:
+        raise QueryError(f"unknown parameter {sorted(unknown)}")
+
+    provinces = parse_list(params.get("province"), "province")
+    regions = parse_list(params.get("region"), "region")
+    years = parse_list(params.get("year"), "year", kinds=(str, int))
+    years = None if years is None else tuple(sorted({parse_year(year) for year in years}))
+    year_from = None if params.get("from") is None else parse_year(params["from"], "from")
+    year_to = None if params.get("to") is None else parse_year(params["to"], "to")
+    return (
+        None if provinces is None else tuple(sorted(set(provinces))),
+        None if regions is None else tuple(sorted(set(regions))),
+        years, year_from, year_to,
+    )
+
+
+def normalize_stats_query(params, summaries):
+    """
+    this function will validate a stats query and return it in a canonical, hashable form.
+    """
+    unknown = set(params) - {"column", "region", "year", "from", "to"}
+    if unknown:
+        raise QueryError(f"unknown parameter {sorted(unknown)}")
+
+    column = params.get("column") or SUMMARY_COLUMNS[0]
+    if column not in SUMMARY_COLUMNS:
+        raise QueryError(f"unknown column {column!r}, available columns are {SUMMARY_COLUMNS}")
+    regions = parse_list(params.get("region"), "region") or [NATIONAL]
+    unknown = [region for region in regions if region not in summaries.scope_index]
+    if unknown:
+        raise QueryError(f"unknown region {unknown}, see /api/v1/regions")
+
+    years = parse_list(params.get("year"), "year", kinds=(str, int))
+    years = set(summaries.years) if years is None else {parse_year(year) for year in years}
+    year_from = -np.inf if params.get("from") is None else parse_year(params["from"], "from")
+    year_to = np.inf if params.get("to") is None else parse_year(params["to"], "to")
+    years = tuple(year for year in summaries.years if year in years and year_from <= year <= year_to)
+    return column, tuple(sorted(set(regions), key=summaries.scope_index.get)), years
+
+
+def create_api(store, version, max_age=3600, cache_size=256):
+    """
+    this function will return the api blueprint over a UMPStore. version is the dataset version reported in every answer.
+    """
+    index = UMPIndex(store)
+    answers = FigureCache(maxsize=cache_size)
+    api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+    def answer(query):
+        """
+        this function will return the (cached) answer of a normalized query.
+        """
+        def build():
+            provinces, regions, years, year_from, year_to = query
+            rows = index.rows(provinces, regions, None if years is None else list(years), year_from, year_to)
+            return {"count": len(rows), "data": index.records(rows)}
+        return answers.get_or_build(query, build)
+
+    def json_response(payload, status=200):
+        body = json.dumps({"version": version, **payload}, ensure_ascii=False, separators=(",", ":"))
+        response = Response(body, status=status, mimetype="application/json")
+        if status == 200 and request.method == "GET":
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+        return response
+
+    @api.errorhandler(QueryError)
+    def query_error(error):
+        return json_response({"error": str(error)}, status=error.status)
+
+    @api.get("/provinces")
+    def list_provinces():
+        data = [{index.key: province_name, "Regional": index.regional[province_name]} for province_name in index.provinces]
+        return json_response({"count": len(data), "years": index.all_years, "data": data})
+
+    @api.get("/regions")
+    def list_regions():
+        return json_response({"count": len(index.region_index), "data": index.region_index})
+
+    @api.get("/provinces/<province_name>")
+    def get_province(province_name):
+        if province_name not in index.province_index:
+            raise QueryError(f"unknown province {province_name!r}, see /api/v1/provinces", status=404)
+        return json_response(answer(normalize_query({"province": [province_name]})))
+
+    @api.get("/years/<int:year>")
+    def get_year(year):
+        if year not in index.all_years:
+            raise QueryError(f"no data for {year}, available years are {index.all_years}", status=404)
+        return json_response(answer(normalize_query({"year": [year]})))
+
+    @api.get("/ump")
+    def query_ump():
+        params = {name: request.args.getlist(name) for name in request.args}
+        for name in ("from", "to"):
+            if name in params:
+                params[name] = params[name][-1]
+        return json_response(answer(normalize_query(params)))
+
+    @api.get("/stats")
+    def query_stats():
+        params = {name: request.args.getlist(name) for name in request.args}
+        for name in ("column", "from", "to"):
+            if name in params:
+                params[name] = params[name][-1]
+        query = normalize_stats_query(params, store.summaries)
+
+        def build():
+            column, regions, years = query
+            data = [{"Regional": region, "Tahun": year, **store.summaries.year(year, column, region)}
+                    for region in regions for year in years]
+            return {"column": column, "statistics": STATISTICS, "count": len(data), "data": data}
+        return json_response(answers.get_or_build(("stats", *query), build))
+
+    @api.post("/batch")
+    def query_batch():
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict) or not isinstance(payload.get("queries"), list):
+            raise QueryError('expected a json body {"queries": [...]}')
+        if len(payload["queries"]) > MAX_BATCH_QUERIES:
+            raise QueryError(f"at most {MAX_BATCH_QUERIES} queries per batch")
+
+        results = []
+        for position, params in enumerate(payload["queries"]):
+            if not isinstance(params, dict):
+                raise QueryError(f"query {position} must be an object")
+            try:
+                results.append(answer(normalize_query(params)))
+            except QueryError as error:
+                raise QueryError(f"query {position}: {error}")
+        return json_response({"count": len(results), "results": results})
+
+    return api
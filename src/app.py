@@ -1,78 +1,208 @@
-from dash import Dash, dcc, Output, Input, html
+from dash import Dash, dcc, Output, Input, State, html, ClientsideFunction, Patch, ctx, no_update
 import dash_bootstrap_components as dbc  
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
-import pandas as pd 
-import pathlib
-
-from urllib.request import urlopen
-import json
-import numpy as np
-
+import gc
+import hashlib
+import logging
+import os
+import time
+from contextlib import contextmanager
+from flask import has_request_context
+
+from api import create_api
+from cache import BundleCache, FigureCache, FileCache
+from compression import register_compression
+from dataset import DATASET_PATH, data_version, load_dataset
+from datastore import UMPStore
+import deflator
+import figures
+from figures import (TREEMAP_METRICS, FigureSkeletons, build_comparison_figure, build_line_figure, build_map_figure,
+                     build_province_series, build_treemap_figure, figure_to_dict, mark_title, with_geojson)
+from geometry import available_levels, register_geojson_routes
+from instrumentation import register_instrumentation, span
+from projection import ALPHA_RANGE, ProjectionEngine
+import regency
+from summaries import load_summaries
+
+## plotly figure modules are imported lazily by figures.py, so importing this module stays cheap
+
+logger = logging.getLogger(__name__)
 
 
 # ************************************************************************************************************************************************************************************
-# -------- Load dataset, data preparation ---------
+# -------- Settings ---------
 # ************************************************************************************************************************************************************************************
 
-## load geojson file
-with open("data/geojson/indonesia.geojson") as f:
-    provinces = json.load(f)
-    
-## load dataset
-filepath = "data/processed/UMP-Tingkat-Provinsi.csv"
-main_df = pd.read_csv(filepath)
-
-## do some data preparation and add some column that needed for the viz
-main_df = main_df.sort_values(by=["Provinsi", "Tahun"])
-main_df['PrevUMP'] = main_df.groupby('Provinsi')['UpahMinimumProvinsi'].shift(1)
-main_df['KenaikanUMP'] = main_df['UpahMinimumProvinsi'] - main_df['PrevUMP']
-main_df["PersentaseKenaikan"] = (((main_df['UpahMinimumProvinsi'] - main_df['PrevUMP']) / main_df['PrevUMP']) * 100).round(2)
-main_df.loc[main_df['KenaikanUMP'] < 0, 'KenaikanUMP'] = 0
+## MAP_DETAIL picks the simplified geometry built by geometry.py: "low", "medium", "high" or "full" (original file),
+## the figures are built and cached with it and the "Detail Peta" control on the dashboard starts from it
+MAP_DETAIL = os.environ.get("MAP_DETAIL", "medium")
+
+## with CLIENTSIDE_HOVER=1 every province series is sent to the browser once and
+## the line chart follows the map hover in javascript (assets/hover.js) without calling the server
+CLIENTSIDE_HOVER = os.environ.get("CLIENTSIDE_HOVER", "1") == "1"
+
+## with CLIENTSIDE_HOVER=0 map hovers are debounced in the browser: the server is only asked for the line chart once
+## the mouse rests on a province for HOVER_DEBOUNCE_MS, so a sweep across the map is one request instead of one per province
+## set it to 0 to send every hover
+HOVER_DEBOUNCE_MS = int(os.environ.get("HOVER_DEBOUNCE_MS", 150))
+
+## FIGURE_BUILD_MODE=parallel registers one callback per figure of the year (map, treemap) instead of one for both,
+## the browser sends them as concurrent requests and two gunicorn workers build them at the same time, so a new year
+## costs about the slowest figure instead of the sum. it needs more than one worker (`gunicorn --workers 2 ...`),
+## with a single worker "serial" saves a request. plotly figures are built in python under the GIL,
+## which is why this uses worker processes rather than a thread pool
+FIGURE_BUILD_MODE = os.environ.get("FIGURE_BUILD_MODE", "serial")
+
+## figures never change for a given year or province, so they are built once and kept in a bounded LRU cache
+## set WARM_FIGURE_CACHE=1 to build (or read from the bundle) every figure and the figure skeletons at startup instead of
+## on first use, with `gunicorn --preload` that happens once in the master and the workers share them copy-on-write
+FIGURE_CACHE_SIZE = int(os.environ.get("FIGURE_CACHE_SIZE", 128))
+
+## with FIGURE_SKELETONS=1 only the first figure of each kind is built with plotly, the others are filled into it
+## (see figures.FigureSkeletons), which takes about a millisecond instead of a few hundred
+FIGURE_SKELETONS = os.environ.get("FIGURE_SKELETONS", "1") == "1"
+WARM_FIGURE_CACHE = os.environ.get("WARM_FIGURE_CACHE", "0") == "1"
+
+## built figures are also stored as json in SHARED_CACHE_DIR, shared by every worker process on the host
+## and invalidated when the data, the geometry or figures.py change; set it to an empty string to disable
+SHARED_CACHE_DIR = os.environ.get("SHARED_CACHE_DIR", "data/cache/figures")
+SHARED_CACHE_MAX_MB = int(os.environ.get("SHARED_CACHE_MAX_MB", 64))
+
+## FIGURE_BUNDLE_DIR points at figures pre-rendered by `python export.py` (e.g. data/bundle),
+## the app then reads every figure from there instead of building it and the shared cache is not used
+FIGURE_BUNDLE_DIR = os.environ.get("FIGURE_BUNDLE_DIR", "")
+
+## responses of at least COMPRESSION_MIN_BYTES are gzipped at COMPRESSION_LEVEL (1-9), and get a content-hash ETag
+## so repeated GETs are answered with 304; the last COMPRESSION_CACHE_SIZE compressed bodies are kept to skip recompressing
+## set COMPRESSION=0 when a proxy in front of gunicorn already compresses
+COMPRESSION = os.environ.get("COMPRESSION", "1") == "1"
+COMPRESSION_MIN_BYTES = int(os.environ.get("COMPRESSION_MIN_BYTES", 1024))
+COMPRESSION_LEVEL = int(os.environ.get("COMPRESSION_LEVEL", 6))
+COMPRESSION_CACHE_SIZE = int(os.environ.get("COMPRESSION_CACHE_SIZE", 64))
+
+## the json api under /api/v1 (see api.py) tells clients to cache its answers for API_MAX_AGE seconds
+API_MAX_AGE = int(os.environ.get("API_MAX_AGE", 3600))
+
+## comparison figures depend on the chosen provinces and years, they get their own LRU cache
+## so browsing many combinations never evicts the map, line and treemap figures
+COMPARISON_CACHE_SIZE = int(os.environ.get("COMPARISON_CACHE_SIZE", 64))
+
+## with PROJECTION=1 the year dropdown also offers the year after the data, projected with the scenario set in the sidebar
+## (see projection.py); PROJECTION_INFLATION and PROJECTION_GROWTH (percent) and PROJECTION_ALPHA are its initial values.
+## the figures of the last PROJECTION_CACHE_SIZE scenarios are kept
+PROJECTION = os.environ.get("PROJECTION", "1") == "1"
+PROJECTION_INFLATION = float(os.environ.get("PROJECTION_INFLATION", 2.5))
+PROJECTION_GROWTH = float(os.environ.get("PROJECTION_GROWTH", 5.0))
+PROJECTION_ALPHA = float(os.environ.get("PROJECTION_ALPHA", 0.2))
+PROJECTION_CACHE_SIZE = int(os.environ.get("PROJECTION_CACHE_SIZE", 32))
+
+## with a price index table at DEFLATOR_PATH (see deflator.py) the map and treemap can also show wages in constant prices
+## of a base year chosen next to the year dropdown; without the file only nominal wages are shown
+DEFLATOR_PATH = os.environ.get("DEFLATOR_PATH", deflator.DEFLATOR_PATH)
+
+## with a regency/city wage (UMK) table at UMK_PATH and its geometry at REGENCY_GEOJSON_PATH (see regency.py), clicking a
+## province on the map shows its regencies and cities; REGENCY_FEATURE_KEY is the geometry property holding the region code.
+## without both files the map stays provincial. the last REGENCY_CACHE_SIZE regency maps are kept
+UMK_PATH = os.environ.get("UMK_PATH", regency.UMK_PATH)
+REGENCY_GEOJSON_PATH = os.environ.get("REGENCY_GEOJSON_PATH", regency.REGENCY_GEOJSON_PATH)
+REGENCY_FEATURE_KEY = os.environ.get("REGENCY_FEATURE_KEY", regency.REGENCY_FEATURE_KEY)
+REGENCY_CACHE_SIZE = int(os.environ.get("REGENCY_CACHE_SIZE", 64))
 
 
-def get_regional(prov):
-        """
-        this function will return a regional or island origin of the province in a dataset. 
-        """
-        regional = []
-
-        sumatera = ['Sumatera Utara', 'Sumatera Barat', 'Riau', 'Jambi', 'Sumatera Selatan','Bengkulu', 'Lampung', 'Aceh', 'Bangka-Belitung', 'Kepulauan Riau']
-        jawa = ['Jakarta Raya', 'Jawa Barat', 'Jawa Tengah', 'Yogyakarta', 'Jawa Timur', 'Banten',]
-        sulawesi = ['Sulawesi Barat', 'Gorontalo', 'Sulawesi Tenggara', 'Sulawesi Selatan', 'Sulawesi Tengah', 'Sulawesi Utara']
-        kalimantan = ['Kalimantan Utara', 'Kalimantan Timur', 'Kalimantan Selatan', 'Kalimantan Tengah', 'Kalimantan Barat']
-        papua = ['Papua', 'Papua Barat']
-        maluku = ['Maluku Utara', 'Maluku']
-        nusatenggara = ['Nusa Tenggara Timur', 'Nusa Tenggara Barat', "Bali"]
-
-        if prov in sumatera:
-                regional.append("Pulau Sumatera")
-        elif prov in jawa:
-                regional.append("Pulau Jawa")
-        elif prov in sulawesi:
-                regional.append("Pulau Sulawesi")
-        elif prov in kalimantan:
-                regional.append("Pulau Kalimantan")
-        elif prov in papua:
-                regional.append("Pulau Papua")
-        elif prov in maluku:
-                regional.append("Kepulauan Maluku")
-        elif prov in nusatenggara:
-                regional.append("Kepulauan Nusa Tenggara")       
-        else:
-                regional.append("Regional Provinsi Tidak Terdaftar")
-
-        return regional[0]
+# ************************************************************************************************************************************************************************************
+# -------- Shared state, created once by create_app ---------
+# ************************************************************************************************************************************************************************************
 
-## add a new column by call the function
-main_df['Regional'] = main_df['Provinsi'].apply(get_regional)
+main_df = None
+store = None
+list_tahun = None
+province_names = set()
+province_series = None
+provinces_url = None
+## {level of detail: geometry url} of the "Detail Peta" control, provinces and regencies
+geojson_urls = {}
+regency_geojson_urls = {}
+figure_cache = FigureCache(maxsize=FIGURE_CACHE_SIZE)
+comparison_cache = FigureCache(maxsize=COMPARISON_CACHE_SIZE)
+projection = None
+projection_cache = FigureCache(maxsize=PROJECTION_CACHE_SIZE)
+real_wages = None
+real_cache = FigureCache(maxsize=FIGURE_CACHE_SIZE)
+regencies = None
+regencies_url = None
+regency_cache = FigureCache(maxsize=REGENCY_CACHE_SIZE)
+skeletons = None
+compressed_bodies = None
+
+## seconds spent in each startup phase of the last create_app call
+startup_timings = {}
+
+
+@contextmanager
+def startup_phase(name):
+    start = time.perf_counter()
+    yield
+    startup_timings[name] = time.perf_counter() - start
+
+
+def figures_version():
+    """
+    this function will return the version of the built figures: the dataset, the geometry url and the builder code.
+    """
+    with open(figures.__file__, "rb") as f:
+        builders_version = hashlib.sha256(f.read()).hexdigest()
+    return hashlib.sha256(f"{data_version(DATASET_PATH)}|{provinces_url}|{builders_version}".encode()).hexdigest()[:16]
+
+
+def create_shared_cache():
+    """
+    this function will return the figure bundle or the cross-worker figure cache backend, or None when both are disabled.
+    """
+    if FIGURE_BUNDLE_DIR:
+        return BundleCache(FIGURE_BUNDLE_DIR, figures_version())
+    if not SHARED_CACHE_DIR:
+        return None
+    return FileCache(SHARED_CACHE_DIR, figures_version(), max_bytes=SHARED_CACHE_MAX_MB * 1024 * 1024)
+
+
+def load_data():
+    """
+    this function will load the dataset and everything derived from it that the callbacks read.
+    """
+    global main_df, store, list_tahun, province_names, province_series, projection, real_wages, regencies
+
+    ## data preparation (derived columns, regional, compact dtypes) lives in dataset.py
+    main_df = load_dataset(DATASET_PATH)
+
+    ## the price index is joined once, wages in constant prices are computed per base year on first use
+    deflator_table = deflator.load_deflator(DEFLATOR_PATH)
+    if deflator_table is not None:
+        main_df = deflator.join_deflator(main_df, deflator_table)
+
+    ## indexed, read-only access by year and by province for the chart builders
+    ## with the per-year national and regional statistics that etl.py stores next to the dataset
+    store = UMPStore(main_df, summaries=load_summaries(main_df, DATASET_PATH))
+
+    ## list of minimum wage years from 2015
+    ## desc sort
+    list_tahun = store.years[store.years >= 2015][::-1]
+
+    ## list of province names, used to validate hovered locations
+    province_names = set(store.provinces)
+
+    ## line chart data of every province for the clientside hover callback
+    province_series = build_province_series(store) if CLIENTSIDE_HOVER else None
+
+    ## next year's wages under the scenario chosen in the sidebar
+    projection = ProjectionEngine(store) if PROJECTION else None
+
+    real_wages = deflator.RealWages(store) if deflator_table is not None else None
+    if real_wages is not None and not real_wages.base_years:
+        real_wages = None
+
+    ## regency/city wages for the map drill-down, split by province
+    regency_table = regency.load_regencies(UMK_PATH, REGENCY_GEOJSON_PATH)
+    regencies = regency.RegencyWages(regency_table) if regency_table is not None else None
 
-## list of minimum wage years from 2015
-## desc sort
-list_tahun = main_df[main_df["Tahun"]>=2015]
-list_tahun = list_tahun.sort_values(by="Tahun", ascending=False)
-list_tahun = list_tahun["Tahun"].unique()
 
 # ************************************************************************************************************************************************************************************
 # -------- Build web components ---------
@@ -90,21 +220,6 @@ untuk memastikan bahwa kamu mendapatkan gaji yang layak. Silahkan kunjungi
 jika kamu menerima gaji yang lebih rendah dari UMP yang telah ditetapkan untuk mencari tahu apa langkah yang harus dilakukan.
 """
 
-dropdown = dcc.Dropdown(options=list_tahun,
-                        value=2023,  # initial value displayed when page first loads
-                        clearable=False, 
-                        style={"width":"40%", "height":"5%", "text-align":"left", 
-                                "font-family":"Futura", "font-size":"12px"})
-
-map_graph = dcc.Graph(figure={}, className='row')
-line_graph = dcc.Graph(figure={}, className='row')
-treemap_graph = dcc.Graph(figure={})
-
-## set the themes to dark
-app = Dash(__name__, external_stylesheets=[dbc.themes.DARKLY])
-server = app.server
-
-
 def create_dashboard_title(title):
     return dcc.Markdown(title, className="dashboard-title")
 
@@ -122,7 +237,7 @@ def create_dropdown(options, initial_value):
 def create_graph(figure, className):
     return dcc.Graph(figure=figure, className=className)
 
-def create_sidebar_card(title, description, source_code_link):
+def create_sidebar_card(title, description, source_code_link, projection_controls=None):
     return dbc.Card([
         dbc.CardBody([
             create_dashboard_title(title),
@@ -131,25 +246,106 @@ def create_sidebar_card(title, description, source_code_link):
             dbc.Button(
                 "Source Code", href=source_code_link,
                 color="primary", size="sm", external_link=True
-            )
+            ),
+            projection_controls
         ])
     ], className="sidebar-card")
 
-def create_main_card(dropdown, map_graph, line_graph):
+def create_projection_input(input_id, label, value, **limits):
+    return html.Div([
+        html.Label(label, htmlFor=input_id, className="projection-label"),
+        dcc.Input(id=input_id, type="number", value=value, debounce=True, required=True,
+                  className="projection-input", **limits)
+    ], className="projection-field")
+
+def create_projection_controls(year):
+    return html.Div([
+        html.Hr(),
+        html.Label(f"Skenario Proyeksi UMP {year}", className="dropdown-label"),
+        dcc.Markdown("UMP baru = UMP + (inflasi + pertumbuhan ekonomi x alpha) x UMP, pilih tahun "
+                     f"{year} (Proyeksi) pada peta.", className="projection-description"),
+        create_projection_input("projection-inflation", "Inflasi (%)", PROJECTION_INFLATION, step=0.1),
+        create_projection_input("projection-growth", "Pertumbuhan Ekonomi (%)", PROJECTION_GROWTH, step=0.1),
+        create_projection_input("projection-alpha", "Alpha", PROJECTION_ALPHA, min=ALPHA_RANGE[0], max=ALPHA_RANGE[1], step=0.01)
+    ], className="projection-controls")
+
+MAP_DETAIL_LABELS = {"low": "Rendah", "medium": "Sedang", "high": "Tinggi", "full": "Asli"}
+
+def create_map_controls(detail_levels, drilldown):
+    detail = [
+        html.Label("Detail Peta: ", className="dropdown-label"),
+        dcc.RadioItems(
+            id="map-detail",
+            options=[{"label": MAP_DETAIL_LABELS[level], "value": level} for level in detail_levels],
+            value=MAP_DETAIL,
+            inline=True,
+            className="map-detail"
+        )
+    ] if len(detail_levels) > 1 else []
+    drill = [
+        html.Button("Kembali ke peta provinsi", id="map-back", hidden=True, className="map-back"),
+        html.Span("Klik provinsi pada peta untuk melihat UMK kabupaten/kota", className="map-hint")
+    ] if drilldown else []
+    return html.Div(detail + drill, className="map-controls") if detail or drill else None
+
+def create_main_card(dropdown, map_graph, line_graph, comparison, stores, price_controls=None, map_controls=None):
     return dbc.Card([
         dbc.CardBody([
             dbc.CardHeader([
                 html.Label("Pilih Tahun: ", className="dropdown-label"),
-                dropdown
+                dropdown,
+                price_controls
             ]),
+            map_controls,
             map_graph,
-            line_graph
+            line_graph,
+            comparison,
+            html.Div(stores, hidden=True)
         ])
     ], className="main-card")
 
-def create_rightside_card(treemap_graph):
+def create_price_controls(base_years):
+    return html.Div([
+        dcc.RadioItems(
+            id="price-view",
+            options=[{"label": "Nominal", "value": "nominal"}, {"label": "Harga Konstan", "value": "real"}],
+            value="nominal",
+            inline=True,
+            className="price-view"
+        ),
+        html.Label("Tahun Dasar: ", className="dropdown-label"),
+        dcc.Dropdown(id="real-base-year", options=base_years, value=base_years[-1], clearable=False, className="real-base-year")
+    ], className="price-controls")
+
+## provinces shown in the comparison when the page loads
+COMPARISON_DEFAULT_PROVINCES = ["Jakarta Raya", "Jawa Barat", "Jawa Tengah", "Jawa Timur", "Yogyakarta", "Banten"]
+
+def create_comparison_section(province_options, years, comparison_graph):
+    provinces, year_from, year_to = default_comparison()
+    return html.Div([
+        dbc.CardHeader([
+            html.Label("Bandingkan Provinsi: ", className="dropdown-label"),
+            dcc.Dropdown(id="comparison-provinces", options=province_options, value=provinces,
+                         multi=True, placeholder="Pilih provinsi", className="comparison-dropdown"),
+            dcc.RangeSlider(id="comparison-years", min=years[0], max=years[-1], step=None, pushable=1,
+                            marks={year: str(year) for year in years}, value=[year_from, year_to],
+                            className="comparison-years")
+        ]),
+        comparison_graph
+    ], className="comparison-section")
+
+def create_metric_selector(initial_value):
+    return dcc.RadioItems(
+        id="treemap-metric",
+        options=[{"label": "Jumlah", "value": "KenaikanUMP"}, {"label": "Persentase", "value": "PersentaseKenaikan"}],
+        value=initial_value,
+        inline=True,
+        className="treemap-metric"
+    )
+
+def create_rightside_card(metric_selector, treemap_graph):
     return dbc.Card([
-        dbc.CardBody(treemap_graph, className="rightside-card-body")
+        dbc.CardBody([metric_selector, treemap_graph], className="rightside-card-body")
     ], className="rightside-card")
 
 def create_app_layout(sidebar_card, main_card, rightside_card):
@@ -161,202 +357,464 @@ def create_app_layout(sidebar_card, main_card, rightside_card):
         ], className=["h-100", "g-0"])
     ], fluid=True, className="app-container")
 
-app.layout = create_app_layout(
-    create_sidebar_card(mytitle, description, "https://github.com/datawithalvin/indonesia-provinces-minimum-wage"),
-    create_main_card(dropdown, map_graph, line_graph),
-    create_rightside_card(treemap_graph)
-)
-
-@app.callback(
-    Output(map_graph, "figure"),
-    Output(line_graph, "figure"),
-    Output(treemap_graph, "figure"),
-    Input(dropdown, "value"),
-    Input(map_graph, "hoverData")
-)
-def update_graphs(selected_year, hover_data):
-    map_fig, line_fig, treemap_fig = minimum_wage_map(selected_year, hover_data)
-    return map_fig, line_fig, treemap_fig
-
-def minimum_wage_map(selected_year, hover_data):
-        print(selected_year)
-        print(type(selected_year))
-
-        # ************************************************************************************************************************************************************************************
-        # -------- choropleth map ---------
-        # ************************************************************************************************************************************************************************************
-
-
-        ## build dataframe
-        ## filter dataframe by selected year
-        dff = main_df.copy()
-        dff = dff[dff["Tahun"]==selected_year]
-
-        dff["UMP"] = dff["UpahMinimumProvinsi"]/1000000
-        dff["UMP"] = np.round(dff["UMP"], 2)
-        dff["UMP"] = "Rp " + dff['UMP'].astype(str) + " Juta"
-        dff.reset_index(drop=True, inplace=True)
-
-        year = dff["Tahun"][0]
-        upah_min = np.min(dff["UpahMinimumProvinsi"])
-        upah_max= np.max(dff["UpahMinimumProvinsi"])
-        upah_med = np.median(dff["UpahMinimumProvinsi"])
-
-        round_min = np.round((upah_min/1000000), 2)
-        round_max = np.round((upah_max/1000000), 2)
-        round_med  = np.round((upah_med/1000000), 2)
-
-        text_upah = [f"Rp {round_min} Juta", f"Rp {round_med} Juta", f"Rp {round_max} Juta"]
-
-
-        ## build figure
-        map_fig = px.choropleth(
-                dff, geojson=provinces, color="UpahMinimumProvinsi",
-                locations="Provinsi", featureidkey="properties.state", 
-                color_continuous_scale=px.colors.sequential.Viridis_r,
-                hover_data={"Provinsi":True, "UpahMinimumProvinsi":':,'}
-                )
-
-        map_fig.update_geos(fitbounds="locations", visible=False )
-
-        map_fig.update_layout(autosize=False, margin={"r":0,"t":0,"l":0,"b":0, "pad":0}, width=900,height=380)
-        map_fig.update_coloraxes(
-                colorbar_tickmode="array", colorbar_tickvals=[upah_min, upah_med, upah_max],
-                colorbar_ticktext=[text_upah[0], text_upah[1], text_upah[2]],
-                colorbar_len=0.4, colorbar_thickness=10, colorbar_orientation="h", 
-                colorbar_title=dict(text="", side="top"), colorbar_ticklabelposition="outside bottom", colorbar_tickfont_size=12,
-                colorbar_y=0
-                )
-        map_fig.update_layout(
-                title=f"<b>Peta Upah Minimum Provinsi Tahun {year}</b>",
-                title_x=0.5, title_y=0.95, title_font_size=18
-                )
-        map_fig.update_layout(template='plotly_dark')
-        map_fig.update_layout(font=dict(family='Futura'))
-
-
-
-
-        # ************************************************************************************************************************************************************************************
-        # -------- line charts ---------
-        # ************************************************************************************************************************************************************************************
-
-        ## build dataframe for first line chart
-        ## create a function that will get a data from hovered location on the map
-        ## use the hovered location name as a filter for the dataframe
-        ## the figure will display a line chart that have timeries data for selected province
-        dff1 = main_df.copy()
-
-        def get_province_name():
-                if hover_data is not None:
-                        province_name = hover_data["points"][0]["location"]
-                        return province_name
-                else:
-                        province_name = "Jakarta Raya"
-                        return province_name
-
-        province_name = get_province_name()
-        dff1 = dff1[dff1["Provinsi"]==province_name]
-        dff1["Provinsi"] = dff1["Provinsi"].replace({"Jakarta Raya":"DKI Jakarta"})
-        dff1 = dff1.sort_values(by="Tahun")
-        dff1.reset_index(drop=True, inplace=True)
-
-        ## add new columns
-        ## replace all negative values
-        dff1["KenaikanUpah"] = dff1["UpahMinimumProvinsi"] - dff1["UpahMinimumProvinsi"].shift(1)
-        dff1["KenaikanPersen"] = (((dff1["UpahMinimumProvinsi"] - dff1["UpahMinimumProvinsi"].shift(1)) / dff1["UpahMinimumProvinsi"].shift(1)) * 100).round(2)
-
-        dff1.loc[dff1['KenaikanUpah'] < 0, 'KenaikanUpah'] = 0
-        dff1.loc[dff1['KenaikanPersen'] < 0, 'KenaikanPersen'] = 0
-
-        prov_name = dff1["Provinsi"][0]
-
-
-        ## build dataframe for first second chart
-        median_df = main_df.copy()
-        median_df = median_df.groupby('Tahun').aggregate({"KenaikanUMP":"mean"}).reset_index()
-        median_df = median_df.sort_values(by="Tahun") # sort by year
+def serve_layout():
+    """
+    the layout is built per page load so the initial line chart comes from the figure cache instead of being built at import.
+    """
+    year_options = [{"label": str(year), "value": int(year)} for year in list_tahun]
+    if projection:
+        year_options.insert(0, {"label": f"{projection.year} (Proyeksi)", "value": projection.year})
+    dropdown = dcc.Dropdown(id="year-dropdown", options=year_options,
+                            value=2023,  # initial value displayed when page first loads
+                            clearable=False, 
+                            style={"width":"40%", "height":"5%", "text-align":"left", 
+                                    "font-family":"Futura", "font-size":"12px"})
+
+    ## the clientside hover callback patches the line chart, so it needs a full figure to start from
+    ## (dash also calls this once at startup, outside a request, only to validate the layout)
+    line_figure = get_line_figure("Jakarta Raya") if CLIENTSIDE_HOVER and has_request_context() else {}
+
+    map_graph = dcc.Graph(id="map-graph", figure={}, className='row')
+    line_graph = dcc.Graph(id="line-graph", figure=line_figure, className='row')
+    treemap_graph = dcc.Graph(id="treemap-graph", figure={})
+    comparison_graph = dcc.Graph(id="comparison-graph", figure={}, className='row')
+    province_options = [{"label": label, "value": value} for value, label in comparison_options()]
+    comparison = create_comparison_section(province_options, [int(year) for year in store.years], comparison_graph)
+    stores = [dcc.Store(id="province-series", data=province_series)]
+    if not CLIENTSIDE_HOVER and HOVER_DEBOUNCE_MS > 0:
+        stores += [dcc.Store(id="hover-committed"), dcc.Interval(id="hover-debounce", interval=HOVER_DEBOUNCE_MS, disabled=True)]
+    if regencies:
+        ## the province whose regencies the map shows, None for the province map
+        stores.append(dcc.Store(id="map-province", data=None))
+
+    return create_app_layout(
+        create_sidebar_card(mytitle, description, "https://github.com/datawithalvin/indonesia-provinces-minimum-wage",
+                            create_projection_controls(projection.year) if projection else None),
+        create_main_card(dropdown, map_graph, line_graph, comparison, stores,
+                         create_price_controls(real_wages.base_years) if real_wages else None,
+                         create_map_controls(list(geojson_urls), bool(regencies))),
+        create_rightside_card(create_metric_selector("KenaikanUMP"), treemap_graph)
+    )
 
 
+# ************************************************************************************************************************************************************************************
+# -------- Callbacks ---------
+# ************************************************************************************************************************************************************************************
 
-        ## build figure
-        line_fig = make_subplots(
-                rows=1, cols=2, 
-                subplot_titles=(f'<b>Jumlah Kenaikan UMP Tahunan Provinsi {prov_name}</b>', 
-                                "<b>Rerata Jumlah Kenaikan UMP Nasional Tahun 2001 - 2023</b>")
-        )
+## cached figures are plain json data (see figures.figure_to_dict), dash sends them as they are
+## the build and serialize spans only show up in Server-Timing (and /metrics) when a figure is not cached yet
+def is_projection(selected_year):
+    return projection is not None and selected_year == projection.year
+
+def get_scenario(inflation=PROJECTION_INFLATION, growth=PROJECTION_GROWTH, alpha=PROJECTION_ALPHA):
+    """
+    this function will return the scenario of the sidebar inputs as (inflation, growth, alpha),
+    or None while one of them is empty or out of range.
+    """
+    if inflation is None or growth is None or alpha is None or not ALPHA_RANGE[0] <= alpha <= ALPHA_RANGE[1]:
+        return None
+    return float(inflation), float(growth), float(alpha)
+
+def get_real_base_year(prices, base_year):
+    """
+    this function will return the base year of the constant prices view, or None when nominal wages are shown.
+    """
+    if real_wages is None or prices != "real" or base_year not in real_wages.base_years:
+        return None
+    return int(base_year)
+
+def build_store_figure(kind, other_store, selected_year, metric="KenaikanUMP"):
+    """
+    this function will build the map or treemap of a year from another store than the dataset's (a projection, constant prices).
+    """
+    if skeletons:
+        filled = skeletons.with_store(other_store)
+        return filled.map_figure(selected_year) if kind == "map" else filled.treemap_figure(selected_year, metric)
+    if kind == "map":
+        return figure_to_dict(build_map_figure(other_store, selected_year, provinces_url))
+    return figure_to_dict(build_treemap_figure(other_store, selected_year, metric))
+
+## a scenario of None (an empty or out-of-range sidebar input) draws the default scenario, and says so under the title
+def get_projection_figure(kind, scenario, metric="KenaikanUMP"):
+    fallback = scenario is None
+    scenario = scenario or get_scenario()
+    def build():
+        with span("projection_build"):
+            fig = build_store_figure(kind, projection.store(scenario), projection.year, metric)
+        return mark_title(fig, projection.year, "Proyeksi", "Skenario bawaan, input skenario tidak valid" if fallback else None)
+    return projection_cache.get_or_build((kind, projection.year, metric if kind == "treemap" else None, scenario, fallback), build)
+
+def get_real_figure(kind, selected_year, base_year, metric="KenaikanUMP"):
+    def build():
+        with span("real_build"):
+            real_store = real_wages.store(base_year)
+            if selected_year not in real_store.year_index:
+                nominal_fig = get_map_figure(selected_year) if kind == "map" else get_treemap_figure(selected_year, metric)
+                return mark_title(nominal_fig, selected_year, "Nominal, IHK tidak tersedia")
+            fig = build_store_figure(kind, real_store, selected_year, metric)
+        ## the treemap's own note counts the real cuts it leaves out (see figures.treemap_note)
+        return mark_title(fig, selected_year, f"Harga Konstan {base_year}")
+    return real_cache.get_or_build((kind, selected_year, metric if kind == "treemap" else None, base_year), build)
+
+def get_regency_figure(province_name, selected_year):
+    def build():
+        with span("regency_build"):
+            regency_store = regencies.store(province_name)
+            if selected_year not in regency_store.year_index:
+                return mark_title(get_map_figure(selected_year), selected_year, "UMK kabupaten/kota tidak tersedia")
+            fig = build_map_figure(regency_store, selected_year, regencies_url, REGENCY_FEATURE_KEY, hover_name=regency_store.label)
+            province_label = regency_store.by_year["NamaProvinsi"].iloc[0]
+        return mark_title(figure_to_dict(fig), selected_year, f"UMK Kabupaten/Kota {province_label}")
+    return regency_cache.get_or_build(("regency", province_name, selected_year), build)
+
+def get_detail_figure(fig, map_detail):
+    """
+    this function will return the map figure with the geometry of the level of detail picked on the dashboard.
+    cached figures keep the MAP_DETAIL geometry, only the url of the returned copy changes.
+    """
+    if map_detail is None or map_detail == MAP_DETAIL or map_detail not in geojson_urls:
+        return fig
+    urls = {provinces_url: geojson_urls[map_detail]}
+    if regencies_url:
+        urls[regencies_url] = regency_geojson_urls[map_detail]
+    geojson_url = fig["data"][0].get("geojson")
+    return with_geojson(fig, urls[geojson_url]) if geojson_url in urls else fig
+
+## projections and constant prices are provincial, the regency drill-down only applies to nominal wages of a data year
+def get_map_figure(selected_year, scenario=None, real_base_year=None, map_province=None):
+    if is_projection(selected_year):
+        return get_projection_figure("map", scenario)
+    if real_base_year is not None:
+        return get_real_figure("map", selected_year, real_base_year)
+    if map_province is not None and regencies and map_province in regencies:
+        return get_regency_figure(map_province, selected_year)
+    def build():
+        with span("choropleth_build"):
+            if skeletons:
+                return skeletons.map_figure(selected_year)
+            fig = build_map_figure(store, selected_year, provinces_url)
+        return figure_to_dict(fig)
+    return figure_cache.get_or_build(("map", selected_year), build)
+
+def get_line_figure(province_name):
+    def build():
+        with span("subplot_build"):
+            if skeletons:
+                return skeletons.line_figure(province_name)
+            fig = build_line_figure(store, province_name)
+        return figure_to_dict(fig)
+    return figure_cache.get_or_build(("line", province_name), build)
+
+def get_treemap_figure(selected_year, metric="KenaikanUMP", scenario=None, real_base_year=None):
+    if is_projection(selected_year):
+        return get_projection_figure("treemap", scenario, metric)
+    if real_base_year is not None:
+        return get_real_figure("treemap", selected_year, real_base_year, metric)
+    def build():
+        with span("treemap_build"):
+            if skeletons:
+                return skeletons.treemap_figure(selected_year, metric)
+            fig = build_treemap_figure(store, selected_year, metric)
+        return figure_to_dict(fig)
+    return figure_cache.get_or_build(("treemap", selected_year, metric), build)
+
+def comparison_options():
+    """
+    this function will return (province, display name) of every province, sorted by display name.
+    """
+    names = {province_name: str(store.province(province_name)[store.label].iloc[0]) for province_name in store.provinces}
+    return sorted(names.items(), key=lambda item: item[1])
+
+def default_comparison():
+    """
+    this function will return the (provinces, year_from, year_to) the comparison shows when the page loads.
+    """
+    year_to = int(store.years[-1])
+    return [province_name for province_name in COMPARISON_DEFAULT_PROVINCES if province_name in province_names], year_to - 8, year_to
+
+def comparison_key(provinces, year_from, year_to):
+    return ("comparison", year_from, year_to, ",".join(sorted(set(provinces) & province_names)))
+
+def get_comparison_figure(provinces, year_from, year_to):
+    provinces = sorted(set(provinces) & province_names)
+    def build():
+        with span("comparison_build"):
+            fig = build_comparison_figure(store, provinces, year_from, year_to)
+        return figure_to_dict(fig)
+    return comparison_cache.get_or_build(comparison_key(provinces, year_from, year_to), build)
+
+def update_comparison_graph(provinces, year_range):
+    if not year_range:
+        return no_update
+    year_from, year_to = sorted(int(year) for year in year_range)
+    ## a range between two data years (e.g. only 2017) has nothing to compare
+    if not ((store.years >= year_from) & (store.years <= year_to)).any():
+        return no_update
+    return get_comparison_figure(provinces or [], year_from, year_to)
+
+## the year drives the map and treemap, the hovered province only drives the line chart
+## so a hover never re-sends the choropleth or the treemap to the browser
+## the projection inputs only change the figures while the projected year is selected, the price inputs only outside it
+PROJECTION_INPUTS = ("projection-inflation", "projection-growth", "projection-alpha")
+PRICE_INPUTS = ("price-view", "real-base-year")
+
+def figures_unchanged(selected_year, scenario, real_base_year):
+    """
+    this function will tell when the input that triggered a year callback doesn't change its figures: a scenario input
+    outside the projected year, a price input in it (projections are nominal), no scenario at all (invalid inputs and
+    invalid PROJECTION_* defaults), or a base year picked while nominal wages are shown.
+    """
+    if is_projection(selected_year):
+        return (scenario is None and get_scenario() is None) or ctx.triggered_id in PRICE_INPUTS
+    if ctx.triggered_id in PROJECTION_INPUTS:
+        return True
+    return ctx.triggered_id == "real-base-year" and real_base_year is None
+
+## the scenario, price, drill-down and detail inputs are only passed (by keyword) when projection, constant prices,
+## regencies and several levels of detail are enabled
+def update_year_graphs(selected_year, metric, inflation=None, growth=None, alpha=None, prices="nominal", base_year=None,
+                       map_province=None, map_detail=None):
+    scenario = get_scenario(inflation, growth, alpha)
+    real_base_year = get_real_base_year(prices, base_year)
+    if figures_unchanged(selected_year, scenario, real_base_year):
+        return no_update, no_update
+    ## switching the treemap metric leaves the map as it is, a drill-down or level of detail leaves the treemap
+    if ctx.triggered_id == "treemap-metric":
+        map_fig = no_update
+    else:
+        map_fig = get_detail_figure(get_map_figure(selected_year, scenario, real_base_year, map_province), map_detail)
+    if ctx.triggered_id in ("map-province", "map-detail"):
+        return map_fig, no_update
+    return map_fig, get_treemap_figure(selected_year, metric, scenario, real_base_year)
+
+def update_map_graph(selected_year, inflation=None, growth=None, alpha=None, prices="nominal", base_year=None,
+                     map_province=None, map_detail=None):
+    scenario = get_scenario(inflation, growth, alpha)
+    real_base_year = get_real_base_year(prices, base_year)
+    if figures_unchanged(selected_year, scenario, real_base_year):
+        return no_update
+    return get_detail_figure(get_map_figure(selected_year, scenario, real_base_year, map_province), map_detail)
+
+def update_map_province(click_data, back_clicks, map_province):
+    """
+    this function will drill down into the clicked province when it has regencies, and back to the province map
+    with the back button, which is only shown while drilled down.
+    """
+    if ctx.triggered_id == "map-back":
+        return None, True
+    clicked = click_data["points"][0].get("location") if click_data else None
+    if map_province is None and clicked in regencies:
+        return clicked, False
+    return no_update, no_update
+
+def update_treemap_graph(selected_year, metric, inflation=None, growth=None, alpha=None, prices="nominal", base_year=None):
+    scenario = get_scenario(inflation, growth, alpha)
+    real_base_year = get_real_base_year(prices, base_year)
+    if figures_unchanged(selected_year, scenario, real_base_year):
+        return no_update
+    return get_treemap_figure(selected_year, metric, scenario, real_base_year)
+
+def update_line_graph(hover_data):
+    province_name = get_province_name(hover_data)
+    if province_name not in province_names:
+        return no_update
+
+    line_fig = get_line_figure(province_name)
+
+    ## first render sends the full figure, later hovers only patch the province trace and its subplot title
+    if ctx.triggered_id is None:
+        return line_fig
+
+    patched_fig = Patch()
+    patched_fig["data"][0]["x"] = line_fig["data"][0]["x"]
+    patched_fig["data"][0]["y"] = line_fig["data"][0]["y"]
+    patched_fig["layout"]["annotations"][0]["text"] = line_fig["layout"]["annotations"][0]["text"]
+    return patched_fig
+
+def get_province_name(hover_data):
+        """
+        this function will return the province name from hovered location on the map, Jakarta Raya by default.
+        """
+        if hover_data is not None:
+                province_name = hover_data["points"][0]["location"]
+                return province_name
+        else:
+                province_name = "Jakarta Raya"
+                return province_name
 
-        line_fig.add_trace(
-                go.Scatter(x=dff1["Tahun"], y=dff1["KenaikanUpah"], name="Kenaikan Upah"),
-                row=1, col=1, 
-                
+def figure_cache_gauges():
+        """
+        this function will return the figure and compressed body cache counters for /metrics.
+        """
+        stats = figure_cache.stats()
+        gauges = {("ump_figure_cache", key): stats[key] for key in ("hits", "misses", "size")}
+        if "shared" in stats:
+                gauges.update({
+                        ("ump_shared_cache", key): value for key, value in stats["shared"].items()
+                        if isinstance(value, (int, float)) and not isinstance(value, bool)
+                })
+        for name, cache in (("ump_comparison_cache", comparison_cache), ("ump_projection_cache", projection_cache),
+                            ("ump_real_cache", real_cache), ("ump_regency_cache", regency_cache)):
+                cache_stats = cache.stats()
+                gauges.update({(name, key): cache_stats[key] for key in ("hits", "misses", "size")})
+        if compressed_bodies is not None:
+                compression_stats = compressed_bodies.stats()
+                gauges.update({("ump_compressed_cache", key): compression_stats[key] for key in ("hits", "misses", "size")})
+        return gauges
+
+def warm_figure_cache():
+        """
+        this function will build the figures for every year in the dropdown (map, treemap of every metric), every province
+        and the comparison shown on page load up front, and the skeletons the figures of other stores
+        (projection, constant prices) are filled into.
+        """
+        if skeletons:
+                skeletons.warm()
+        for year in list_tahun:
+                get_map_figure(year, get_scenario())
+                for metric in TREEMAP_METRICS:
+                        get_treemap_figure(year, metric, get_scenario())
+        for province_name in sorted(province_names):
+                get_line_figure(province_name)
+        get_comparison_figure(*default_comparison())
+
+def register_callbacks(app):
+    if FIGURE_BUILD_MODE not in ("serial", "parallel"):
+        raise ValueError(f"unknown FIGURE_BUILD_MODE {FIGURE_BUILD_MODE!r}, use 'serial' or 'parallel'")
+
+    year_inputs = {"selected_year": Input("year-dropdown", "value")}
+    if projection:
+        year_inputs.update(zip(("inflation", "growth", "alpha"), (Input(input_id, "value") for input_id in PROJECTION_INPUTS)))
+    if real_wages:
+        year_inputs.update(prices=Input("price-view", "value"), base_year=Input("real-base-year", "value"))
+    metric_input = {"metric": Input("treemap-metric", "value")}
+    map_inputs = {"map_province": Input("map-province", "data")} if regencies else {}
+    if len(geojson_urls) > 1:
+        map_inputs["map_detail"] = Input("map-detail", "value")
+
+    if FIGURE_BUILD_MODE == "parallel":
+        app.callback(output=Output("map-graph", "figure"), inputs={**year_inputs, **map_inputs})(update_map_graph)
+        app.callback(output=Output("treemap-graph", "figure"), inputs={**year_inputs, **metric_input})(update_treemap_graph)
+    else:
+        app.callback(
+            output=[Output("map-graph", "figure"), Output("treemap-graph", "figure")],
+            inputs={**year_inputs, **metric_input, **map_inputs}
+        )(update_year_graphs)
+
+    if regencies:
+        app.callback(
+            Output("map-province", "data"),
+            Output("map-back", "hidden"),
+            Input("map-graph", "clickData"),
+            Input("map-back", "n_clicks"),
+            State("map-province", "data"),
+            prevent_initial_call=True
+        )(update_map_province)
+
+    app.callback(
+        Output("comparison-graph", "figure"),
+        Input("comparison-provinces", "value"),
+        Input("comparison-years", "value")
+    )(update_comparison_graph)
+
+    if CLIENTSIDE_HOVER:
+        app.clientside_callback(
+            ClientsideFunction(namespace="ump", function_name="updateLineGraph"),
+            Output("line-graph", "figure"),
+            Input("map-graph", "hoverData"),
+            State("line-graph", "figure"),
+            State("province-series", "data")
         )
-
-        line_fig.add_trace(
-                go.Scatter(x=median_df["Tahun"], y=median_df["KenaikanUMP"], name="Kenaikan Upah"),
-                row=1, col=2
+    elif HOVER_DEBOUNCE_MS > 0:
+        app.clientside_callback(
+            ClientsideFunction(namespace="ump", function_name="debounceHover"),
+            Output("hover-committed", "data"),
+            Output("hover-debounce", "disabled"),
+            Input("map-graph", "hoverData"),
+            Input("hover-debounce", "n_intervals"),
+            State("hover-debounce", "interval"),
+            State("hover-committed", "data")
         )
+        app.callback(
+            Output("line-graph", "figure"),
+            Input("hover-committed", "data")
+        )(update_line_graph)
+    else:
+        app.callback(
+            Output("line-graph", "figure"),
+            Input("map-graph", "hoverData")
+        )(update_line_graph)
 
-        line_fig.update_layout(template='plotly_dark')
-        line_fig.update_layout(autosize=False,width=1100,height=300, showlegend=False)
-        line_fig.update_layout(font=dict(family='Futura'))
-        line_fig.update_annotations(font_size=16, y=1.15)
-        line_fig.update_traces(line=dict(color='steelblue'))
-        line_fig.update_layout(yaxis=dict(tickformat=',.0f', tickprefix='Rp ', title='', showgrid=False), 
-                                yaxis2=dict(tickformat=',.0f', tickprefix='Rp ', title='', showgrid=False))
-        line_fig.update_layout(yaxis2=dict(range=[median_df["KenaikanUMP"].min(), median_df["KenaikanUMP"].max()]))
-        line_fig.update_layout(xaxis=dict(title='Tahun', showgrid=False), xaxis2=dict(title='Tahun', showgrid=False))
-        line_fig.update_layout(hovermode="x unified")
-
-
-        # ************************************************************************************************************************************************************************************
-        # -------- treemap ---------
-        # ************************************************************************************************************************************************************************************
-
-        # build dataframe
-        # filter dataframe by selected year
-        dff2 = main_df.copy()
-        dff2 = dff2[dff2["Tahun"]==2023]
-        dff2 = dff2[["Provinsi", "Tahun", "Regional", "KenaikanUMP"]]
-        dff2["Provinsi"] = dff2["Provinsi"].replace({"Jakarta Raya":"DKI Jakarta"})
-        dff2.reset_index(drop=True, inplace=True)
-
-        upah_min2 = np.min(dff2["KenaikanUMP"])
-        upah_max2= np.max(dff2["KenaikanUMP"])
-        upah_med2 = np.median(dff2["KenaikanUMP"])
-
-        round_min2 = np.int32((upah_min2/1000))
-        round_max2 = np.int32((upah_max2/1000))
-        round_med2  = np.int32((upah_med2/1000))
-
-        text_upah2 = [f"Rp {round_min2} Ribu", f"Rp {round_med2} Ribu", f"Rp {round_max2} Ribu"]
-        year2 = dff2["Tahun"][0]
-
-
-        ## build figure
-        treemap_fig = px.treemap(
-                dff2, path=[px.Constant("Indonesia"), "Regional", "Provinsi"], values="KenaikanUMP",
-                color="KenaikanUMP",color_continuous_scale='Viridis_r', hover_name="Provinsi",
-                hover_data=["KenaikanUMP"]
-                )
-
-        ## update figure layout
-        treemap_fig.update_layout(
-                title="<b>Jumlah Kenaikan UMP Tahun 2023<b>",
-                title_x=0.45, title_font_size=16, title_y=0.97, 
-                )
-        treemap_fig.update_layout(margin = dict(t=50, l=0, r=25, b=15))
-        treemap_fig.update_layout(autosize=False,width=350,height=500)
-        treemap_fig.update_layout(template='plotly_dark')
-        treemap_fig.update_coloraxes(
-                colorbar_tickmode="array", colorbar_tickvals=[upah_min2, upah_med2, upah_max2],
-                colorbar_ticktext=[text_upah2[0], text_upah2[1], text_upah2[2]], colorbar_tickfont_size=12,
-                colorbar_len=0.8, colorbar_thickness=10, colorbar_orientation="h", colorbar_title=dict(text="", side="top"), 
-                colorbar_ticklabelposition="outside bottom", colorbar_y=-0.12, colorbar_x=0.5,
-                )
-        treemap_fig.update_layout(font=dict(family='Futura'))
-
-        return map_fig, line_fig, treemap_fig
+
+# ************************************************************************************************************************************************************************************
+# -------- App factory ---------
+# ************************************************************************************************************************************************************************************
+
+def create_app():
+    """
+    this function will build the dash app: load data, serve the geometry, set the layout and callbacks,
+    and optionally warm the figure cache. the time of every phase is kept in startup_timings.
+    everything is created once per process, so with `gunicorn --preload` it runs in the master only.
+    """
+    global provinces_url, regencies_url, geojson_urls, regency_geojson_urls, figure_cache, comparison_cache, projection_cache, real_cache, regency_cache
+    global skeletons, compressed_bodies
+    startup_timings.clear()
+
+    with startup_phase("data"):
+        load_data()
+
+    with startup_phase("app"):
+        ## set the themes to dark
+        app = Dash(__name__, external_stylesheets=[dbc.themes.DARKLY])
+
+        ## the choropleth references the geometry by url, so the browser downloads it once and caches it
+        ## every level of detail built by geometry.py gets its own route for the "Detail Peta" control
+        detail_levels = available_levels()
+        if MAP_DETAIL not in detail_levels:
+            detail_levels.append(MAP_DETAIL)
+        geojson_urls = register_geojson_routes(app.server, detail_levels)
+        provinces_url = geojson_urls[MAP_DETAIL]
+        regency_geojson_urls = register_geojson_routes(app.server, detail_levels, REGENCY_GEOJSON_PATH) if regencies else {}
+        regencies_url = regency_geojson_urls.get(MAP_DETAIL)
+
+        ## the numbers behind the dashboard as json, for other services
+        app.server.register_blueprint(create_api(store, data_version(DATASET_PATH), max_age=API_MAX_AGE))
+
+        app.layout = serve_layout
+        register_callbacks(app)
+
+        ## Server-Timing header on every response and /metrics, unless INSTRUMENTATION=0
+        register_instrumentation(app.server, gauges=figure_cache_gauges)
+
+        if COMPRESSION:
+            compressed_bodies = register_compression(
+                app.server, min_bytes=COMPRESSION_MIN_BYTES, level=COMPRESSION_LEVEL, cache_size=COMPRESSION_CACHE_SIZE
+            )
+
+    with startup_phase("figure_cache"):
+        ## comparisons share the backend, so the page load comparison is read from the bundle too
+        shared = create_shared_cache()
+        figure_cache = FigureCache(maxsize=FIGURE_CACHE_SIZE, shared=shared)
+        comparison_cache = FigureCache(maxsize=COMPARISON_CACHE_SIZE, shared=shared)
+        projection_cache = FigureCache(maxsize=PROJECTION_CACHE_SIZE)
+        real_cache = FigureCache(maxsize=FIGURE_CACHE_SIZE)
+        regency_cache = FigureCache(maxsize=REGENCY_CACHE_SIZE)
+        skeletons = FigureSkeletons(store, provinces_url) if FIGURE_SKELETONS else None
+
+    if WARM_FIGURE_CACHE:
+        with startup_phase("warm_figure_cache"):
+            warm_figure_cache()
+
+    ## move everything built so far out of the garbage collector's reach,
+    ## so forked workers don't touch (and copy) those pages when the collector runs
+    gc.freeze()
+
+    logger.info("startup: %s", ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in startup_timings.items()))
+    return app
+
+
+app = create_app()
+server = app.server
 
 if __name__ == '__main__':
-    app.run_server(debug=True)
\ No newline at end of file
+    app.run_server(debug=True)
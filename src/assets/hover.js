@@ -0,0 +1,46 @@
+// clientside callbacks, used when the app runs with CLIENTSIDE_HOVER=1 (the default)
+// every province series is shipped once in a dcc.Store, so hovering the map never calls the server
+
+// time of the last map hover, for debounceHover
+var lastHoverTime = 0;
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    ump: {
+        updateLineGraph: function(hoverData, figure, series) {
+            var province = hoverData ? hoverData.points[0].location : "Jakarta Raya";
+            var entry = series ? series[province] : undefined;
+            if (!entry || !figure || !figure.data) {
+                return window.dash_clientside.no_update;
+            }
+
+            // copy the parts that change so dash sees a new figure object
+            var newFigure = Object.assign({}, figure);
+            newFigure.data = figure.data.slice();
+            newFigure.data[0] = Object.assign({}, figure.data[0], {x: entry.x, y: entry.y});
+            newFigure.layout = Object.assign({}, figure.layout);
+            newFigure.layout.annotations = figure.layout.annotations.slice();
+            newFigure.layout.annotations[0] = Object.assign({}, figure.layout.annotations[0], {text: entry.title});
+            return newFigure;
+        },
+
+        // used with CLIENTSIDE_HOVER=0: the line chart is built on the server, so hovers are debounced here.
+        // a hover (re)starts the hover-debounce interval; on a tick, once the mouse has rested for one interval,
+        // the hover is committed to the hover-committed store (which calls the server) and the interval stops.
+        // sweeping across several provinces therefore sends one request, for the province the mouse stops on.
+        debounceHover: function(hoverData, nIntervals, interval, committed) {
+            var noUpdate = window.dash_clientside.no_update;
+            var triggered = window.dash_clientside.callback_context.triggered.map(function(t) { return t.prop_id; });
+            if (triggered.indexOf("map-graph.hoverData") !== -1) {
+                lastHoverTime = Date.now();
+                return [noUpdate, false];
+            }
+            if (Date.now() - lastHoverTime < interval) {
+                return [noUpdate, noUpdate];
+            }
+
+            var province = hoverData ? hoverData.points[0].location : null;
+            var committedProvince = committed ? committed.points[0].location : null;
+            return [province === committedProvince ? noUpdate : hoverData, true];
+        }
+    }
+});
@@ -0,0 +1,269 @@
+import glob
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import warnings
+from collections import OrderedDict
+
+
+class FigureCache:
+    """
+    a small bounded LRU cache for built plotly figures.
+    figures are stored by key, e.g. ("map", 2023) or ("line", "Jawa Barat"), and built only once.
+
+    with a shared backend (see CacheBackend) a miss is looked up there before building, and new values are
+    written to it, so worker processes reuse each other's figures. values must then be json serializable.
+    """
+
+    def __init__(self, maxsize=128, shared=None):
+        self.maxsize = maxsize
+        self.shared = shared
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, builder):
+        """
+        return the cached value for key, calling builder() and storing its result on a miss.
+        """
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+
+        ## build outside the lock so a slow figure doesn't block other keys
+        value = self._get_shared(key)
+        if value is None:
+            value = builder()
+            self._set_shared(key, value)
+
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return value
+
+    def _get_shared(self, key):
+        if self.shared is None:
+            return None
+        data = self.shared.get(key)
+        return None if data is None else json.loads(data)
+
+    def _set_shared(self, key, value):
+        if self.shared is not None:
+            self.shared.set(key, json.dumps(value, separators=(",", ":")).encode())
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            stats = {"hits": self.hits, "misses": self.misses, "size": len(self._items), "maxsize": self.maxsize}
+        if self.shared is not None:
+            stats["shared"] = self.shared.stats()
+        return stats
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+
+class CacheBackend:
+    """
+    interface of a cache shared between worker processes. keys are tuples, values are bytes.
+    a backend only ever returns values stored under its own version, so changing the version invalidates everything.
+    """
+
+    def get(self, key):
+        """
+        return the bytes stored for key, or None.
+        """
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self):
+        return {}
+
+
+def key_digest(key):
+    """
+    this function will return a stable file-safe name for a cache key, numpy and python ints give the same name.
+    """
+    return hashlib.sha1(json.dumps([str(part) for part in key]).encode()).hexdigest()
+
+
+class FileCache(CacheBackend):
+    """
+    a size-bounded LRU cache in a local directory, shared by every process on the host.
+
+    values live in <directory>/<version>/<key digest>.bin. writes go through a temporary file and os.replace,
+    so readers never see half a file. a read touches the file's mtime and eviction removes the oldest files
+    once the directory is larger than max_bytes. directories of other versions are removed at startup.
+    """
+
+    def __init__(self, directory, version, max_bytes=64 * 1024 * 1024):
+        self.directory = os.path.join(directory, version)
+        self.version = version
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self._remove_other_versions(directory)
+
+    def _remove_other_versions(self, directory):
+        for path in glob.glob(os.path.join(directory, "*")):
+            if os.path.isdir(path) and os.path.basename(path) != self.version:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key_digest(key)}.bin")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(value)
+        os.replace(tmp_path, self._path(key))
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, "*.bin")):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue  # removed by another process
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def stats(self):
+        files = glob.glob(os.path.join(self.directory, "*.bin"))
+        return {
+            "backend": "file", "version": self.version, "hits": self.hits, "misses": self.misses,
+            "evictions": self.evictions, "entries": len(files),
+            "bytes": sum(os.path.getsize(path) for path in files if os.path.exists(path)), "max_bytes": self.max_bytes,
+        }
+
+
+class StaleBundleWarning(UserWarning):
+    """
+    raised (as a warning) when a figure bundle doesn't match the running app and figures are built instead.
+    """
+
+
+class BundleCache(CacheBackend):
+    """
+    a directory of pre-rendered figures written by export.py, one json file per key plus a manifest.json.
+
+    files are named after the key, e.g. map/2023.json, line/Jawa Barat.json and treemap/2023/KenaikanUMP.json, so the bundle can
+    also be published as it is on static hosting. the bundle is only used when the manifest has the expected version,
+    otherwise every get misses. set only writes when the bundle was opened with writable=True.
+    """
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, directory, version, writable=False):
+        self.directory = directory
+        self.version = version
+        self.writable = writable
+        self.hits = 0
+        self.misses = 0
+        self.usable = writable or self._check_manifest()
+
+    def _check_manifest(self):
+        try:
+            with open(os.path.join(self.directory, self.MANIFEST)) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            warnings.warn(f"no figure bundle in {self.directory}, building figures instead; run `python export.py`",
+                          StaleBundleWarning, stacklevel=3)
+            return False
+        if manifest.get("version") != self.version:
+            warnings.warn(f"the figure bundle in {self.directory} was exported from other data or code, "
+                          "building figures instead; run `python export.py` to refresh it", StaleBundleWarning, stacklevel=3)
+            return False
+        return True
+
+    def path(self, key):
+        *folders, name = [str(part) for part in key]
+        return os.path.join(self.directory, *folders, f"{name}.json")
+
+    def get(self, key):
+        if not self.usable:
+            return None
+        try:
+            with open(self.path(key), "rb") as f:
+                value = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        if not self.writable:
+            return
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(value)
+
+    def write_manifest(self, keys, **extra):
+        """
+        this function will mark the bundle as complete for this version, listing the files it holds.
+        """
+        manifest = {"version": self.version, "files": sorted(os.path.relpath(self.path(key), self.directory) for key in keys)}
+        manifest.update(extra)
+        with open(os.path.join(self.directory, self.MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def stats(self):
+        return {"backend": "bundle", "version": self.version, "usable": self.usable, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,65 @@
+"""
+gzip compression and content-hash ETags for the responses of the flask server behind dash.
+
+every compressible response (callback json, layout, index page, component scripts, geometry) gets an ETag computed
+from its uncompressed body, with a "-gzip" suffix on the gzipped representation. GET requests that send the same tag
+back in If-None-Match are answered with 304 and no body, and bodies of at least min_bytes are gzipped for clients
+that accept it. the figures are deterministic, so the same
+bodies come back again and again: the gzipped bytes are kept in a small LRU cache keyed by the ETag and compressed once.
+
+browsers don't revalidate POST requests, so dash callbacks (POST /_dash-update-component) only get the compression.
+"""
+
+import gzip
+import hashlib
+
+from flask import request
+
+from cache import FigureCache
+
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json", "application/javascript", "text/javascript", "text/css", "text/html", "text/plain",
+}
+
+
+def register_compression(server, min_bytes=1024, level=6, cache_size=64):
+    """
+    this function will add ETags, 304 answers and gzip compression to the responses of the flask server.
+    returns the cache of compressed bodies, see FigureCache.stats.
+    """
+    compressed_bodies = FigureCache(maxsize=cache_size)
+
+    @server.after_request
+    def compress_response(response):
+        if (response.status_code != 200 or response.direct_passthrough
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES or "Content-Encoding" in response.headers):
+            return response
+
+        body = response.get_data()
+
+        ## responses that already carry a content hash (geometry, dash component scripts) keep it
+        etag, weak = response.get_etag()
+        if etag is None:
+            etag, weak = hashlib.sha1(body).hexdigest()[:16], True
+            if not response.cache_control.max_age:
+                response.cache_control.no_cache = True  # keep it, but ask with If-None-Match before using it
+
+        ## the gzip body is another representation, so it gets its own validator
+        response.vary.add("Accept-Encoding")
+        compress = len(body) >= min_bytes and "gzip" in request.accept_encodings
+        if compress:
+            etag = f"{etag}-gzip"
+        response.set_etag(etag, weak=weak)
+
+        if request.method in ("GET", "HEAD"):
+            response = response.make_conditional(request)
+            if response.status_code == 304:
+                return response
+
+        if compress:
+            response.set_data(compressed_bodies.get_or_build((etag, level), lambda: gzip.compress(body, level, mtime=0)))
+            response.headers["Content-Encoding"] = "gzip"
+        return response
+
+    return compressed_bodies
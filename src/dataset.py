@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+DATASET_PATH = "data/processed/UMP-Tingkat-Provinsi.csv"
+
+## the prepared dataset (derived columns, regional, sort order) is also kept as a typed binary artifact next to the csv,
+## written by etl.py: <name>.npy holds one structured array, <name>.meta.json its schema, categories and source csv hash
+## bump when prepare_dataset changes the columns it derives
+ARTIFACT_VERSION = 1
+
+NUMERIC_COLUMNS = {
+    "Tahun": "int16",
+    "UpahMinimumProvinsi": "int32",
+    "PrevUMP": "float64",
+    "KenaikanUMP": "float64",
+    "PersentaseKenaikan": "float64",
+}
+CATEGORICAL_COLUMNS = ["Provinsi", "Regional", "NamaProvinsi"]
+
+UNMAPPED_REGIONAL = "Regional Provinsi Tidak Terdaftar"
+
+## regional or island origin of every province, as used by the treemap
+REGIONS = {
+    "Pulau Sumatera": ['Sumatera Utara', 'Sumatera Barat', 'Riau', 'Jambi', 'Sumatera Selatan', 'Bengkulu', 'Lampung', 'Aceh', 'Bangka-Belitung', 'Kepulauan Riau'],
+    "Pulau Jawa": ['Jakarta Raya', 'Jawa Barat', 'Jawa Tengah', 'Yogyakarta', 'Jawa Timur', 'Banten'],
+    "Pulau Sulawesi": ['Sulawesi Barat', 'Gorontalo', 'Sulawesi Tenggara', 'Sulawesi Selatan', 'Sulawesi Tengah', 'Sulawesi Utara'],
+    "Pulau Kalimantan": ['Kalimantan Utara', 'Kalimantan Timur', 'Kalimantan Selatan', 'Kalimantan Tengah', 'Kalimantan Barat'],
+    "Pulau Papua": ['Papua', 'Papua Barat'],
+    "Kepulauan Maluku": ['Maluku Utara', 'Maluku'],
+    "Kepulauan Nusa Tenggara": ['Nusa Tenggara Timur', 'Nusa Tenggara Barat', "Bali"],
+}
+
+## flat lookup table province -> regional
+PROVINCE_REGIONAL = {province: regional for regional, provinces in REGIONS.items() for province in provinces}
+
+## province names as displayed in chart titles and the treemap
+DISPLAY_NAMES = {"Jakarta Raya": "DKI Jakarta"}
+
+
+class UnmappedProvinceWarning(UserWarning):
+    """
+    raised (as a warning) when a province in the dataset has no entry in REGIONS.
+    """
+
+
+class StaleArtifactWarning(UserWarning):
+    """
+    raised (as a warning) when the binary artifact can't be used and the dataset is prepared from the csv instead.
+    """
+
+
+def assign_regional(provinces):
+    """
+    this function will map a series of province names to their regional with one vectorized lookup.
+    provinces missing from REGIONS get UNMAPPED_REGIONAL and an UnmappedProvinceWarning listing them.
+    """
+    regional = provinces.map(PROVINCE_REGIONAL)
+    unmapped = sorted(set(provinces[regional.isna()]))
+    if unmapped:
+        warnings.warn(
+            f"no regional mapping for {unmapped}, add them to dataset.REGIONS; using {UNMAPPED_REGIONAL!r}",
+            UnmappedProvinceWarning, stacklevel=2
+        )
+    return regional.fillna(UNMAPPED_REGIONAL)
+
+
+def prepare_dataset(df, key="Provinsi"):
+    """
+    this function will add the columns needed for the viz and store them with compact dtypes.
+    the frame is sorted by key (the column naming the region, see datastore.UMPStore) and year.
+    """
+    df = df.sort_values(by=[key, "Tahun"]).reset_index(drop=True)
+    df["Tahun"] = pd.to_numeric(df["Tahun"], downcast="integer")
+    df["UpahMinimumProvinsi"] = pd.to_numeric(df["UpahMinimumProvinsi"], downcast="integer")
+
+    ## add some column that needed for the viz
+    ## increases stay float64 so figures and percentages keep their exact values
+    df['PrevUMP'] = df.groupby(key)['UpahMinimumProvinsi'].shift(1).astype("float64")
+    df['KenaikanUMP'] = df['UpahMinimumProvinsi'] - df['PrevUMP']
+    df["PersentaseKenaikan"] = (((df['UpahMinimumProvinsi'] - df['PrevUMP']) / df['PrevUMP']) * 100).round(2)
+    df.loc[df['KenaikanUMP'] < 0, 'KenaikanUMP'] = 0
+
+    provinces = df["Provinsi"].astype(str)
+    df["Regional"] = pd.Categorical(assign_regional(provinces))
+    df["NamaProvinsi"] = pd.Categorical(provinces.replace(DISPLAY_NAMES))
+    df["Provinsi"] = pd.Categorical(provinces)
+    return df
+
+
+def file_sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def artifact_fingerprint():
+    """
+    this function will return a hash of everything besides the csv that decides the prepared columns.
+    """
+    definition = json.dumps([ARTIFACT_VERSION, NUMERIC_COLUMNS, CATEGORICAL_COLUMNS, REGIONS, DISPLAY_NAMES], sort_keys=True)
+    return hashlib.sha256(definition.encode()).hexdigest()
+
+
+def artifact_paths(csv_path=DATASET_PATH):
+    """
+    this function will return the (array, meta) paths of the binary artifact that belongs to a csv.
+    """
+    root = os.path.splitext(csv_path)[0]
+    return f"{root}.npy", f"{root}.meta.json"
+
+
+def data_version(csv_path=DATASET_PATH):
+    """
+    this function will return a short version of the prepared dataset: the csv content and how it is prepared.
+    caches of anything computed from the dataset should be keyed on it.
+    """
+    return hashlib.sha256((file_sha256(csv_path) + artifact_fingerprint()).encode()).hexdigest()[:16]
+
+
+def code_dtype(n_categories):
+    """
+    this function will return the smallest signed integer dtype that holds the codes of n_categories (and -1 for missing).
+    """
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories - 1 <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def write_artifact(df, csv_path=DATASET_PATH):
+    """
+    this function will save a prepared dataset as a structured numpy array plus its schema.
+    categorical columns are stored as integer codes, sized by their number of categories, with the categories in the meta file.
+    """
+    dtype = [(column, np.dtype(kind)) for column, kind in NUMERIC_COLUMNS.items()]
+    dtype += [(column, code_dtype(len(df[column].cat.categories))) for column in CATEGORICAL_COLUMNS]
+    records = np.empty(len(df), dtype=dtype)
+    for column in NUMERIC_COLUMNS:
+        records[column] = df[column].to_numpy()
+    for column in CATEGORICAL_COLUMNS:
+        records[column] = df[column].cat.codes.to_numpy()
+
+    meta = {
+        "version": ARTIFACT_VERSION,
+        "fingerprint": artifact_fingerprint(),
+        "source_sha256": file_sha256(csv_path),
+        "rows": len(df),
+        "columns": list(df.columns),
+        "categories": {column: df[column].cat.categories.tolist() for column in CATEGORICAL_COLUMNS},
+    }
+    artifact_path, meta_path = artifact_paths(csv_path)
+    np.save(artifact_path, records, allow_pickle=False)
+    with open(meta_path, "w") as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+
+
+def read_artifact(csv_path=DATASET_PATH):
+    """
+    this function will return the prepared dataset from the binary artifact (memory-mapped),
+    or None with a StaleArtifactWarning when it is missing, from another schema or built from another csv.
+    """
+    artifact_path, meta_path = artifact_paths(csv_path)
+    if not (os.path.exists(artifact_path) and os.path.exists(meta_path)):
+        warnings.warn(f"{artifact_path} not found, preparing the dataset from {csv_path}; run `python etl.py` to build it",
+                      StaleArtifactWarning, stacklevel=3)
+        return None
+
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta.get("version") != ARTIFACT_VERSION or meta.get("fingerprint") != artifact_fingerprint():
+        reason = "was built by another version of dataset.py"
+    elif meta.get("source_sha256") != file_sha256(csv_path):
+        reason = f"was built from a different {csv_path}"
+    else:
+        reason = None
+    if reason:
+        warnings.warn(f"{artifact_path} {reason}, preparing the dataset from the csv; run `python etl.py` to rebuild it",
+                      StaleArtifactWarning, stacklevel=3)
+        return None
+
+    records = np.load(artifact_path, mmap_mode="r", allow_pickle=False)
+    columns = {column: records[column] for column in NUMERIC_COLUMNS}
+    try:
+        for column in CATEGORICAL_COLUMNS:
+            columns[column] = pd.Categorical.from_codes(records[column], categories=meta["categories"][column])
+    except ValueError as error:
+        ## e.g. codes that overflowed their dtype in an artifact written before the dtype was sized by category count
+        warnings.warn(f"{artifact_path} has invalid codes ({error}), preparing the dataset from the csv; "
+                      "run `python etl.py` to rebuild it", StaleArtifactWarning, stacklevel=3)
+        return None
+    return pd.DataFrame(columns)[meta["columns"]]
+
+
+def load_dataset(filepath=DATASET_PATH):
+    """
+    this function will return the dataset prepared for the dashboard, read from the binary artifact
+    when it is up to date with the csv and prepared from the csv otherwise.
+    """
+    df = read_artifact(filepath)
+    if df is None:
+        df = prepare_dataset(pd.read_csv(filepath))
+    return df
@@ -0,0 +1,76 @@
+import numpy as np
+
+
+def build_ranges(sorted_keys):
+    """
+    this function will return a dict of key -> (start, stop) row range over an array that is already sorted by key.
+    """
+    if len(sorted_keys) == 0:
+        return {}
+    boundaries = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+    starts = np.concatenate(([0], boundaries))
+    stops = np.concatenate((boundaries, [len(sorted_keys)]))
+    keys = sorted_keys[starts].tolist()
+    return {key: (int(start), int(stop)) for key, start, stop in zip(keys, starts, stops)}
+
+
+class UMPStore:
+    """
+    read-only, indexed access to the minimum wage dataset.
+
+    the dataset is sorted once by (region, Tahun) and once by (Tahun, region) at load time, and every lookup
+    returns a row slice of one of those frames (a view, not a copy). chart builders must not modify what they get back.
+
+    key is the column naming the region, "Provinsi" for the provincial dataset, and label the column with its
+    display name (chart titles, treemap leaves). a finer dataset (e.g. regencies/cities) gets the same o(1) lookups
+    with its own key and label columns; the province_* names then refer to that key.
+
+    summaries are the per-year national and regional statistics of the dataset (see summaries.YearlySummaries),
+    aggregates like the national mean and the map colorbar ticks are read from them.
+    """
+
+    def __init__(self, df, key="Provinsi", summaries=None, label="NamaProvinsi"):
+        self.key = key
+        self.label = label
+        self.summaries = summaries
+        self.by_province = df.sort_values(by=[key, "Tahun"]).reset_index(drop=True)
+        self.by_year = df.sort_values(by=["Tahun", key]).reset_index(drop=True)
+
+        self.province_index = build_ranges(self.by_province[key].to_numpy())
+        self.year_index = build_ranges(self.by_year["Tahun"].to_numpy())
+
+        self.provinces = list(self.province_index)
+        ## row of every province in matrix(), o(1) instead of self.provinces.index
+        self.province_position = {province_name: position for position, province_name in enumerate(self.provinces)}
+        self.years = np.array(list(self.year_index))
+        self._matrices = {}
+
+    def year(self, year):
+        """
+        this function will return the rows of every province for one year, sorted by province.
+        """
+        start, stop = self.year_index[year]
+        return self.by_year.iloc[start:stop]
+
+    def province(self, province_name):
+        """
+        this function will return the rows of one province for every year, sorted by year.
+        """
+        start, stop = self.province_index[province_name]
+        return self.by_province.iloc[start:stop]
+
+    def matrix(self, column):
+        """
+        this function will return column pivoted to a float array of shape (provinces, years), NaN where a province has no row.
+        rows follow self.provinces and columns self.years. computed once per column, callers must not modify it.
+        """
+        if column not in self._matrices:
+            rows = np.repeat(np.arange(len(self.provinces)), [stop - start for start, stop in self.province_index.values()])
+            columns = np.searchsorted(self.years, self.by_province["Tahun"].to_numpy())
+            values = np.full((len(self.provinces), len(self.years)), np.nan)
+            values[rows, columns] = self.by_province[column].to_numpy(dtype=float)
+            self._matrices[column] = values
+        return self._matrices[column]
+
+    def __contains__(self, province_name):
+        return province_name in self.province_index
@@ -0,0 +1,128 @@
+"""
+minimum wages in constant prices, deflated with a provincial consumer price index (IHK) table.
+
+the table is a local csv, data/raw/ihk-provinsi.csv by default (see DEFLATOR_PATH in app.py), with the columns
+
+    Provinsi,Tahun,IHK
+
+one row per province and year, any index base. province names may use the spellings of the raw wage sources
+(see etl.PROVINCE_ALIASES). rows for "Indonesia" give the national index, used for every year of the provinces that
+have no rows of their own. a series never mixes a provincial and the national index (their bases differ), so a
+province with its own index has no constant-price wages in the years its index doesn't cover.
+
+the index is joined to the dataset once at load time (join_deflator). the wage of a province in year t at the prices
+of base year b is UMP(t) * IHK(b) / IHK(t) with the index of that province, rounded to whole rupiah; increases and
+percentages are derived from it like dataset.prepare_dataset does for nominal wages, except that a real increase keeps
+its sign: a nominal raise below inflation is a real cut, not a zero (the treemap notes the cuts it can't draw). RealWages keeps one prepared
+store per base year, so switching between base years is a lookup after the first time.
+"""
+
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from cache import FigureCache
+from dataset import prepare_dataset
+from datastore import UMPStore
+from etl import PROVINCE_ALIASES
+from summaries import NATIONAL, build_summaries
+
+
+DEFLATOR_PATH = "data/raw/ihk-provinsi.csv"
+
+
+class MissingDeflatorWarning(UserWarning):
+    """
+    raised (as a warning) when the price index table can't be used and only nominal wages are shown.
+    """
+
+
+def load_deflator(path=DEFLATOR_PATH):
+    """
+    this function will return the price index table (Provinsi, Tahun, IHK), or None when there is no table.
+    a table that can't be used gives None with a MissingDeflatorWarning.
+    """
+    if not os.path.exists(path):
+        return None
+
+    deflator = pd.read_csv(path)
+    missing = {"Provinsi", "Tahun", "IHK"} - set(deflator.columns)
+    if missing:
+        warnings.warn(f"{path} has no column {sorted(missing)}, wages are shown in nominal prices only",
+                      MissingDeflatorWarning, stacklevel=2)
+        return None
+
+    deflator = deflator[["Provinsi", "Tahun", "IHK"]].dropna()
+    deflator["Provinsi"] = deflator["Provinsi"].astype(str).str.strip().replace(PROVINCE_ALIASES)
+    deflator["Tahun"] = deflator["Tahun"].astype("int64")
+    deflator["IHK"] = deflator["IHK"].astype("float64")
+    return deflator[deflator["IHK"] > 0].drop_duplicates(subset=["Provinsi", "Tahun"], keep="last")
+
+
+def join_deflator(df, deflator):
+    """
+    this function will add the price index of every row of a prepared dataset as the IHK column: the province's own
+    index when the table has any rows for it, the national index otherwise, NaN for the years the chosen index lacks.
+    """
+    provincial = deflator.set_index(["Provinsi", "Tahun"])["IHK"]
+    national = deflator[deflator["Provinsi"] == NATIONAL].set_index("Tahun")["IHK"]
+
+    provinces = df["Provinsi"].astype(object)
+    keys = pd.MultiIndex.from_arrays([provinces, df["Tahun"].astype("int64")])
+    index = provincial.reindex(keys).to_numpy()
+    fallback = national.reindex(df["Tahun"].astype("int64")).to_numpy()
+
+    ## the source is chosen per province, not per year, so one series keeps one index base
+    has_own = provinces.isin(set(deflator["Provinsi"]) - {NATIONAL}).to_numpy()
+
+    df = df.copy()
+    df["IHK"] = np.where(has_own, index, fallback)
+    return df
+
+
+class RealWages:
+    """
+    the dataset in constant prices of a base year, one prepared UMPStore (with its summaries) per base year.
+    """
+
+    def __init__(self, store):
+        df = store.by_province
+        self.provinces = np.array([str(province_name) for province_name in df["Provinsi"]], dtype=object)
+        self.years = df["Tahun"].to_numpy()
+        self.wages = df["UpahMinimumProvinsi"].to_numpy(dtype=float)
+        self.index = df["IHK"].to_numpy(dtype=float)
+
+        ## a base year needs an index for at least one province
+        self.base_years = sorted({int(year) for year in self.years[np.isfinite(self.index)]})
+        self._stores = FigureCache(maxsize=max(len(self.base_years), 1))
+
+    def deflate(self, base_year):
+        """
+        this function will return the wage of every row (in store.by_province order) at the prices of base_year,
+        NaN where the province has no index in that year or in base_year.
+        """
+        in_base = self.years == base_year
+        base_index = dict(zip(self.provinces[in_base], self.index[in_base]))
+        base = np.array([base_index.get(province_name, np.nan) for province_name in self.provinces])
+        with np.errstate(invalid="ignore"):
+            return np.round(self.wages * base / self.index)
+
+    def store(self, base_year):
+        """
+        this function will return the store of the wages at the prices of base_year, computed once per base year.
+        rows without an index are left out, so those provinces are missing from the figures.
+        """
+        def build():
+            real = self.deflate(base_year)
+            present = np.isfinite(real)
+            df = prepare_dataset(pd.DataFrame({
+                "Provinsi": self.provinces[present], "Tahun": self.years[present],
+                "UpahMinimumProvinsi": real[present].astype("int64"),
+            }))
+            ## prepare_dataset clips negative increases to 0, real cuts keep their sign
+            df["KenaikanUMP"] = df["UpahMinimumProvinsi"] - df["PrevUMP"]
+            summaries, _ = build_summaries(df)
+            return UMPStore(df, summaries=summaries)
+        return self._stores.get_or_build(int(base_year), build)
@@ -0,0 +1,193 @@
+"""
+etl pipeline that builds data/processed/UMP-Tingkat-Provinsi.csv from the raw sources in data/raw,
+plus the binary artifact with the derived columns that the dashboard loads (see dataset.write_artifact)
+and the per-year summary statistics (see summaries.py), where only the years whose rows changed are recomputed.
+
+this is the notebooks/data-cleansing-and-preparation.ipynb pipeline as a module. every raw source is parsed on its own
+into long format (Provinsi, Tahun, UpahMinimumProvinsi) and cached under data/cache/etl, keyed by the sha256 of
+the raw file. re-running after a new file is dropped in only parses that file; the merge of the cached parts is a concat.
+
+new yearly files named upah-minimum-<year>.xlsx (same layout as upah-minimum-2023.xlsx) are picked up automatically.
+
+run `python etl.py` from the src folder, `python etl.py --force` ignores the cache.
+"""
+
+import argparse
+import glob
+import hashlib
+import os
+
+import pandas as pd
+
+from dataset import DATASET_PATH, PROVINCE_REGIONAL, prepare_dataset, write_artifact
+from summaries import update_summaries
+
+
+RAW_DIR = "data/raw"
+CACHE_DIR = "data/cache/etl"
+
+## every spelling used by the raw sources -> province name used by the geojson and the dashboard
+PROVINCE_ALIASES = {
+    "Kep. Bangka Belitung": "Bangka-Belitung",
+    "Bangka Belitung": "Bangka-Belitung",
+    "Kep. Riau": "Kepulauan Riau",
+    "Sumatra Utara": "Sumatera Utara",
+    "Sumatra Barat": "Sumatera Barat",
+    "Sumatra Selatan": "Sumatera Selatan",
+    "DI Yogyakarta": "Yogyakarta",
+    "Di Yogyakarta": "Yogyakarta",
+    "DI. Yogyakarta": "Yogyakarta",
+    "DKI Jakarta": "Jakarta Raya",
+    "Dki Jakarta": "Jakarta Raya",
+}
+
+## rows in the raw sources that are not a province
+EXCLUDED_ROWS = ["Rata-rata Nasional"]
+
+## values missing ("-") or superseded in the raw sources, corrected by hand in the processed csv
+CORRECTIONS = {
+    ("Yogyakarta", 2016): 1452400,
+    ("Jawa Tengah", 2016): 1909000,
+    ("Jawa Timur", 2016): 3045000,
+    ("Sulawesi Tenggara", 2022): 2576016,
+    ("Maluku", 2023): 2812827,
+}
+
+
+def to_long_format(df, years=None):
+    """
+    this function will turn a wide frame (Provinsi + one column per year) into long format.
+    years limits which year columns are taken from the source.
+    """
+    df = df.rename(columns={"nama_data": "Provinsi", "provinsi": "Provinsi"})
+    df["Provinsi"] = df["Provinsi"].astype(str).str.strip()
+    df = df[~df["Provinsi"].isin(EXCLUDED_ROWS)]
+
+    ## year columns are ints in the xlsx files and strings in the bps csv, anything else (e.g. "2022*") is skipped
+    year_columns = {column: int(column) for column in df.columns if str(column).isdigit()}
+    if years is not None:
+        year_columns = {column: year for column, year in year_columns.items() if year in years}
+
+    long_df = pd.melt(
+        df.rename(columns=year_columns), id_vars=["Provinsi"], value_vars=list(year_columns.values()),
+        var_name="Tahun", value_name="UpahMinimumProvinsi"
+    )
+    long_df = long_df.dropna(subset=["UpahMinimumProvinsi"])
+
+    ## "-" means no provincial minimum wage that year, decimals are truncated like the notebook did
+    long_df["UpahMinimumProvinsi"] = long_df["UpahMinimumProvinsi"].replace({"-": 0}).astype("float64").astype("int64")
+    long_df["Tahun"] = long_df["Tahun"].astype("int64")
+    return long_df
+
+
+def read_bps_csv(path, years=None):
+    df = pd.read_csv(path, delimiter=";")
+    df["provinsi"] = df["provinsi"].str.title()
+    return to_long_format(df, years)
+
+
+def read_xlsx(path, years=None):
+    return to_long_format(pd.read_excel(path), years)
+
+
+## raw sources in order of precedence, a later source wins when two sources give the same province and year
+SOURCES = [
+    {"name": "bps", "path": "upah-minimum-provinsi-raw-bps.csv", "reader": read_bps_csv, "years": None},
+    {"name": "kemenaker", "path": "kemenaker-2018-2022.xlsx", "reader": read_xlsx, "years": [2021]},
+    {"name": "databoks", "path": "databoks-aug-2022.xlsx", "reader": read_xlsx, "years": [2022]},
+]
+
+## yearly files, one year per file
+YEARLY_SOURCE_PATTERN = "upah-minimum-[0-9][0-9][0-9][0-9].xlsx"
+
+
+def discover_sources(raw_dir=RAW_DIR):
+    """
+    this function will return the fixed sources followed by every yearly file found in raw_dir, oldest first.
+    """
+    sources = list(SOURCES)
+    for path in sorted(glob.glob(os.path.join(raw_dir, YEARLY_SOURCE_PATTERN))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        sources.append({"name": name, "path": os.path.basename(path), "reader": read_xlsx, "years": None})
+    return sources
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_source(source, raw_dir=RAW_DIR, cache_dir=CACHE_DIR, force=False):
+    """
+    this function will return the long format rows of one source, parsing the raw file only when its content changed.
+    returns (rows, parsed) where parsed tells if the raw file was read.
+    """
+    path = os.path.join(raw_dir, source["path"])
+    digest = file_hash(path)[:16]
+    cache_path = os.path.join(cache_dir, f"{source['name']}.{digest}.csv")
+
+    if not force and os.path.exists(cache_path):
+        return pd.read_csv(cache_path), False
+
+    rows = source["reader"](path, source["years"])
+    os.makedirs(cache_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(cache_dir, f"{source['name']}.*.csv")):
+        os.remove(stale)
+    rows.to_csv(cache_path, index=False)
+    return rows, True
+
+
+def merge_sources(parts):
+    """
+    this function will combine the long format rows of every source into the processed dataset.
+    """
+    merged = pd.concat(parts, ignore_index=True)
+    merged["Provinsi"] = merged["Provinsi"].replace(PROVINCE_ALIASES)
+
+    unknown = sorted(set(merged["Provinsi"]) - set(PROVINCE_REGIONAL))
+    if unknown:
+        raise ValueError(f"unknown province names {unknown}, add them to etl.PROVINCE_ALIASES or dataset.REGIONS")
+
+    merged = merged.drop_duplicates(subset=["Provinsi", "Tahun"], keep="last")
+
+    for (province, year), value in CORRECTIONS.items():
+        merged.loc[(merged["Provinsi"] == province) & (merged["Tahun"] == year), "UpahMinimumProvinsi"] = value
+
+    merged = merged.sort_values(by=["Tahun", "Provinsi"]).reset_index(drop=True)
+    return merged[["Provinsi", "Tahun", "UpahMinimumProvinsi"]]
+
+
+def run_pipeline(raw_dir=RAW_DIR, cache_dir=CACHE_DIR, output_path=DATASET_PATH, force=False):
+    """
+    this function will build the processed csv and the binary artifact the dashboard loads,
+    and return (dataset, names of the sources that were re-parsed, years whose summaries were recomputed).
+    """
+    parts = []
+    parsed = []
+    for source in discover_sources(raw_dir):
+        rows, was_parsed = load_source(source, raw_dir, cache_dir, force)
+        parts.append(rows)
+        if was_parsed:
+            parsed.append(source["name"])
+
+    dataset = merge_sources(parts)
+    dataset.to_csv(output_path, index=False)
+    prepared = prepare_dataset(dataset)
+    write_artifact(prepared, output_path)
+    _, summarized = update_summaries(prepared, output_path)
+    return dataset, parsed, summarized
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="build the processed minimum wage dataset from data/raw")
+    parser.add_argument("--force", action="store_true", help="re-parse every raw source, ignoring the cache")
+    args = parser.parse_args()
+
+    dataset, parsed, summarized = run_pipeline(force=args.force)
+    print(f"parsed: {', '.join(parsed) if parsed else 'nothing, all sources cached'}")
+    print(f"summarized: {', '.join(map(str, summarized)) if summarized else 'nothing, all years unchanged'}")
+    print(f"wrote {len(dataset)} rows, {dataset['Provinsi'].nunique()} provinces, "
+          f"{dataset['Tahun'].min()}-{dataset['Tahun'].max()} to {DATASET_PATH}")
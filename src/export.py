@@ -0,0 +1,129 @@
+"""
+pre-renders every figure the dashboard can show into a static bundle.
+
+the data space is small: one map and one treemap per metric for every year in the dropdown, one line chart per province,
+and the comparison shown on page load. this writes all of them as figure json into data/bundle (map/<year>.json,
+treemap/<year>/<metric>.json, line/<province>.json, comparison/<from>/<to>/<provinces>.json) with a manifest.json holding the version of the data, geometry and figure code they were built from.
+
+start the app with FIGURE_BUNDLE_DIR=data/bundle to serve figures from the bundle instead of building them, a stale
+bundle is detected from the manifest and ignored. the files are plain json, so they can also go to static hosting.
+
+run `python export.py` from the src folder after `python etl.py`, with MAP_DETAIL set like the app that will serve it.
+`python export.py --verify` checks instead that the skeleton figures (figures.FigureSkeletons) are the same json as the
+plotly builders for every year, metric and province, e.g. after upgrading plotly; it exits with 1 when one differs.
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+BUNDLE_DIR = "data/bundle"
+
+## the exporter must build the figures, not read them from an older bundle
+os.environ["FIGURE_BUNDLE_DIR"] = ""
+
+import app  # noqa: E402
+from cache import BundleCache, FigureCache  # noqa: E402
+from figures import (FigureSkeletons, build_line_figure, build_map_figure, build_treemap_figure,  # noqa: E402
+                     figure_to_dict)
+
+
+def figure_keys():
+    """
+    this function will return the cache key of every figure the callbacks can return.
+    """
+    keys = [("map", int(year)) for year in app.list_tahun]
+    keys += [("treemap", int(year), metric) for year in app.list_tahun for metric in app.TREEMAP_METRICS]
+    keys += [("line", province_name) for province_name in sorted(app.province_names)]
+    keys.append(app.comparison_key(*app.default_comparison()))
+    return keys
+
+
+def export_bundle(directory=BUNDLE_DIR):
+    """
+    this function will write every figure and the manifest into directory, replacing what was there.
+    returns the keys written.
+    """
+    bundle = BundleCache(directory, app.figures_version(), writable=True)
+    bundle.clear()
+
+    ## the app's figure getters write every figure they build to the bundle
+    keys = figure_keys()
+    app.figure_cache = FigureCache(maxsize=len(keys), shared=bundle)
+    app.comparison_cache = FigureCache(maxsize=1, shared=bundle)
+    app.warm_figure_cache()
+
+    bundle.write_manifest(keys, map_detail=app.MAP_DETAIL, geojson_url=app.provinces_url,
+                          exported_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+    return keys
+
+
+def figure_differences(expected, actual, path=""):
+    """
+    this function will return the paths where two figure json documents differ, numbers compared with a relative
+    tolerance of 1e-9 (the skeletons round like plotly's encoder, not bit for bit).
+    """
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        differences = [f"{path}/{key}" for key in sorted(set(expected) ^ set(actual))]
+        for key in sorted(set(expected) & set(actual)):
+            differences += figure_differences(expected[key], actual[key], f"{path}/{key}")
+        return differences
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return [f"{path} (length {len(expected)} != {len(actual)})"]
+        return [difference for position, (left, right) in enumerate(zip(expected, actual))
+                for difference in figure_differences(left, right, f"{path}[{position}]")]
+    numbers = (int, float)
+    if isinstance(expected, numbers) and isinstance(actual, numbers) and not isinstance(expected, bool) and not isinstance(actual, bool):
+        return [] if math.isclose(expected, actual, rel_tol=1e-9, abs_tol=1e-9) else [path]
+    return [] if expected == actual else [path]
+
+
+def verify_skeletons():
+    """
+    this function will compare every skeleton figure with the plotly builders, for the dataset and the default
+    projection when it is enabled. returns {figure key: differing paths} of the figures that differ.
+    """
+    stores = [("", app.store)]
+    if app.projection:
+        stores.append(("projection", app.projection.store(app.get_scenario())))
+
+    skeletons = FigureSkeletons(app.store, app.provinces_url)
+    failures = {}
+    for name, store in stores:
+        filled = skeletons.with_store(store)
+        figures = [(("map", int(year)), filled.map_figure(year), lambda year=year: build_map_figure(store, year, app.provinces_url))
+                   for year in store.years]
+        figures += [(("treemap", int(year), metric), filled.treemap_figure(year, metric),
+                     lambda year=year, metric=metric: build_treemap_figure(store, year, metric))
+                    for year in store.years for metric in app.TREEMAP_METRICS]
+        if not name:
+            figures += [(("line", province_name), filled.line_figure(province_name),
+                         lambda province_name=province_name: build_line_figure(store, province_name))
+                        for province_name in store.provinces]
+        for key, figure, build in figures:
+            differences = figure_differences(figure_to_dict(build()), figure)
+            if differences:
+                failures[(name, *key) if name else key] = differences
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="pre-render every dashboard figure into a static bundle")
+    parser.add_argument("--output", default=BUNDLE_DIR, help=f"bundle directory, default {BUNDLE_DIR}")
+    parser.add_argument("--verify", action="store_true", help="compare the skeleton figures with the plotly builders instead")
+    args = parser.parse_args()
+
+    if args.verify:
+        start = time.perf_counter()
+        failures = verify_skeletons()
+        for key, differences in failures.items():
+            print(f"{key}: {len(differences)} differences, first {differences[:5]}")
+        print(f"{len(failures)} figures differ from the plotly builders ({time.perf_counter() - start:.1f} s)")
+        sys.exit(1 if failures else 0)
+
+    start = time.perf_counter()
+    keys = export_bundle(args.output)
+    print(f"wrote {len(keys)} figures to {args.output} in {time.perf_counter() - start:.1f} s")
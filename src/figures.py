@@ -0,0 +1,544 @@
+"""
+figure builders for the dashboard.
+
+every builder reads from a datastore.UMPStore and returns a new plotly figure, app.py caches them per year / province.
+plotly express and make_subplots are imported inside the builders, so importing this module is cheap and the
+heavy imports only happen when the first figure is built (in the gunicorn master when the cache is warmed).
+"""
+
+import copy
+import json
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import span
+
+
+def figure_to_dict(fig):
+        """
+        this function will return the figure as plain json data, the form the figure cache keeps and shares between workers.
+        """
+        with span("serialize"):
+                return json.loads(fig.to_json())
+
+def map_colorbar_ticks(store, selected_year):
+        """
+        this function will return the colorbar ticks of the map (min, median and max wage of the year) and their labels in millions.
+        """
+        upah_min, upah_med, upah_max = store.summaries.get(selected_year, "UpahMinimumProvinsi", ["min", "median", "max"])
+
+        round_min = np.round((upah_min/1000000), 2)
+        round_max = np.round((upah_max/1000000), 2)
+        round_med  = np.round((upah_med/1000000), 2)
+
+        text_upah = [f"Rp {round_min} Juta", f"Rp {round_med} Juta", f"Rp {round_max} Juta"]
+        return [upah_min, upah_med, upah_max], text_upah
+
+def treemap_colorbar_ticks(values, metric="KenaikanUMP"):
+        """
+        this function will return the colorbar ticks of the treemap (min, median and max of the metric values) and their labels,
+        increases in thousands of rupiah and percentages with one decimal.
+        """
+        if len(values) == 0:
+                return [], []
+        upah_min2 = np.min(values)
+        upah_max2= np.max(values)
+        upah_med2 = np.median(values)
+
+        if metric == "PersentaseKenaikan":
+                return [upah_min2, upah_med2, upah_max2], [f"{np.round(value, 1)}%" for value in (upah_min2, upah_med2, upah_max2)]
+
+        round_min2 = np.int32((upah_min2/1000))
+        round_max2 = np.int32((upah_max2/1000))
+        round_med2  = np.int32((upah_med2/1000))
+
+        text_upah2 = [f"Rp {round_min2} Ribu", f"Rp {round_med2} Ribu", f"Rp {round_max2} Ribu"]
+        return [upah_min2, upah_med2, upah_max2], text_upah2
+
+def build_map_figure(store, selected_year, geojson_url, featureidkey="properties.state", hover_name=None):
+        """
+        this function will build the choropleth map of a year, the geometry is referenced by geojson_url.
+        regions are matched on the store's key column and the featureidkey property of the geometry,
+        hover_name is a column shown as the hover title (e.g. regency names when the key is a region code).
+        """
+        import plotly.express as px
+
+
+        # ************************************************************************************************************************************************************************************
+        # -------- choropleth map ---------
+        # ************************************************************************************************************************************************************************************
+
+
+        ## build dataframe
+        ## rows of the selected year, a view from the indexed store
+        with span("filter"):
+                dff = store.year(selected_year)
+
+                year = dff["Tahun"].iloc[0]
+                tick_upah, text_upah = map_colorbar_ticks(store, selected_year)
+
+
+        ## build figure
+        map_fig = px.choropleth(
+                dff, geojson=geojson_url, color="UpahMinimumProvinsi",
+                locations=store.key, featureidkey=featureidkey, hover_name=hover_name,
+                color_continuous_scale=px.colors.sequential.Viridis_r,
+                hover_data={store.key:True, "UpahMinimumProvinsi":':,'}
+                )
+
+        map_fig.update_geos(fitbounds="locations", visible=False )
+
+        map_fig.update_layout(autosize=False, margin={"r":0,"t":0,"l":0,"b":0, "pad":0}, width=900,height=380)
+        map_fig.update_coloraxes(
+                colorbar_tickmode="array", colorbar_tickvals=tick_upah,
+                colorbar_ticktext=text_upah,
+                colorbar_len=0.4, colorbar_thickness=10, colorbar_orientation="h", 
+                colorbar_title=dict(text="", side="top"), colorbar_ticklabelposition="outside bottom", colorbar_tickfont_size=12,
+                colorbar_y=0
+                )
+        map_fig.update_layout(
+                title=f"<b>Peta Upah Minimum Provinsi Tahun {year}</b>",
+                title_x=0.5, title_y=0.95, title_font_size=18
+                )
+        map_fig.update_layout(template='plotly_dark')
+        map_fig.update_layout(font=dict(family='Futura'))
+
+        return map_fig
+
+def get_province_series(store, province_name):
+        """
+        this function will return the rows of a province sorted by year, including its yearly increase KenaikanUMP.
+        """
+        ## KenaikanUMP is the year-on-year increase within the province, negative values already replaced with 0
+        return store.province(province_name)
+
+def build_province_series(store):
+        """
+        this function will return the line chart data of every province for the clientside hover callback.
+        """
+        series = {}
+        for province_name in sorted(store.provinces):
+                dff1 = get_province_series(store, province_name)
+                series[province_name] = {
+                        "x": dff1["Tahun"].tolist(),
+                        "y": [None if pd.isna(y) else y for y in dff1["KenaikanUMP"]],
+                        "title": f'<b>Jumlah Kenaikan UMP Tahunan Provinsi {dff1[store.label].iloc[0]}</b>',
+                }
+        return series
+
+def build_line_figure(store, province_name):
+        """
+        this function will build the line charts of a province and of the national average.
+        """
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+
+
+        # ************************************************************************************************************************************************************************************
+        # -------- line charts ---------
+        # ************************************************************************************************************************************************************************************
+
+        ## build dataframe for first line chart
+        ## use the hovered location name (see get_province_name) as a filter for the dataframe
+        ## the figure will display a line chart that have timeries data for selected province
+        with span("filter"):
+                dff1 = get_province_series(store, province_name)
+                prov_name = dff1[store.label].iloc[0]
+
+
+                ## build dataframe for first second chart
+                ## national yearly mean, precomputed in the store's summaries
+                median_years, median_values = store.summaries.series("KenaikanUMP", "mean")
+
+
+        ## build figure
+        line_fig = make_subplots(
+                rows=1, cols=2, 
+                subplot_titles=(f'<b>Jumlah Kenaikan UMP Tahunan Provinsi {prov_name}</b>', 
+                                "<b>Rerata Jumlah Kenaikan UMP Nasional Tahun 2001 - 2023</b>")
+        )
+
+        line_fig.add_trace(
+                go.Scatter(x=dff1["Tahun"], y=dff1["KenaikanUMP"], name="Kenaikan Upah"),
+                row=1, col=1, 
+                
+        )
+
+        line_fig.add_trace(
+                go.Scatter(x=median_years, y=median_values, name="Kenaikan Upah"),
+                row=1, col=2
+        )
+
+        line_fig.update_layout(template='plotly_dark')
+        line_fig.update_layout(autosize=False,width=1100,height=300, showlegend=False)
+        line_fig.update_layout(font=dict(family='Futura'))
+        line_fig.update_annotations(font_size=16, y=1.15)
+        line_fig.update_traces(line=dict(color='steelblue'))
+        line_fig.update_layout(yaxis=dict(tickformat=',.0f', tickprefix='Rp ', title='', showgrid=False), 
+                                yaxis2=dict(tickformat=',.0f', tickprefix='Rp ', title='', showgrid=False))
+        line_fig.update_layout(yaxis2=dict(range=[np.nanmin(median_values), np.nanmax(median_values)]))
+        line_fig.update_layout(xaxis=dict(title='Tahun', showgrid=False), xaxis2=dict(title='Tahun', showgrid=False))
+        line_fig.update_layout(hovermode="x unified")
+
+        return line_fig
+
+def comparison_deltas(store, provinces, year_from, year_to):
+        """
+        this function will return the wages of some provinces over a year range with their deltas, computed on the whole
+        (province, year) wage matrix at once: annualized growth against the previous year in the data, and per province
+        the change, CAGR and CAGR rank (1 = fastest) between the first and last year of the range.
+        """
+        wages = store.matrix("UpahMinimumProvinsi")
+        years = store.years.astype(float)
+
+        ## years without data (2017) are skipped, growth over such a gap is annualized like the CAGR
+        with np.errstate(divide="ignore", invalid="ignore"):
+                growth = np.full_like(wages, np.nan)
+                growth[:, 1:] = ((wages[:, 1:] / wages[:, :-1]) ** (1 / np.diff(years)) - 1) * 100
+                growth[~np.isfinite(growth)] = np.nan
+
+                columns = np.flatnonzero((store.years >= year_from) & (store.years <= year_to))
+                start, end = wages[:, columns[0]], wages[:, columns[-1]]
+                span_years = years[columns[-1]] - years[columns[0]]
+                cagr = ((end / start) ** (1 / span_years) - 1) * 100 if span_years > 0 else np.full_like(end, np.nan)
+                cagr[~np.isfinite(cagr) | (start <= 0)] = np.nan
+
+        rows = np.array([store.province_position[province_name] for province_name in provinces], dtype=int)
+        order = np.argsort(-np.nan_to_num(cagr[rows], nan=-np.inf), kind="stable")
+        rank = np.empty(len(rows), dtype=int)
+        rank[order] = np.arange(1, len(rows) + 1)
+        return {
+                "years": store.years[columns], "wages": wages[np.ix_(rows, columns)], "growth": growth[np.ix_(rows, columns)],
+                "change": (end - start)[rows], "cagr": cagr[rows], "rank": rank,
+        }
+
+def build_comparison_figure(store, provinces, year_from, year_to):
+        """
+        this function will build the comparison of many provinces over a year range: their wages overlaid, ranked by the
+        last year's wage in the legend, and their CAGR as ranked bars.
+        """
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+
+
+        # ************************************************************************************************************************************************************************************
+        # -------- comparison charts ---------
+        # ************************************************************************************************************************************************************************************
+
+        with span("filter"):
+                provinces = [province_name for province_name in provinces if province_name in store]
+                deltas = comparison_deltas(store, provinces, year_from, year_to)
+                names = [str(store.province(province_name)[store.label].iloc[0]) for province_name in provinces]
+                years = deltas["years"]
+
+
+        ## build figure
+        comparison_fig = make_subplots(
+                rows=1, cols=2, column_widths=[0.65, 0.35], horizontal_spacing=0.2,
+                subplot_titles=(f"<b>Upah Minimum Provinsi Tahun {years[0]} - {years[-1]}</b>",
+                                f"<b>Pertumbuhan Rata-rata per Tahun (CAGR) {years[0]} - {years[-1]}</b>")
+        )
+
+        ## wages, the legend is ordered by the wage of the last year
+        for position in np.argsort(-np.nan_to_num(deltas["wages"][:, -1], nan=-np.inf), kind="stable"):
+                comparison_fig.add_trace(
+                        go.Scatter(x=years, y=deltas["wages"][position], customdata=deltas["growth"][position], name=names[position],
+                                   hovertemplate="Rp %{y:,.0f} (%{customdata:+.2f}%)"),
+                        row=1, col=1
+                )
+
+        ## CAGR ranking, the fastest growing province on top
+        order = np.argsort(deltas["rank"])[::-1]
+        comparison_fig.add_trace(
+                go.Bar(x=deltas["cagr"][order], y=[f"{deltas['rank'][position]}. {names[position]}" for position in order],
+                       customdata=np.column_stack((deltas["change"][order], deltas["wages"][order, -1])) if len(order) else None,
+                       orientation="h", marker_color="steelblue", showlegend=False,
+                       texttemplate="%{x:.2f}%", textposition="auto",
+                       hovertemplate=f"%{{y}}<br>CAGR %{{x:.2f}}%<br>Kenaikan Rp %{{customdata[0]:,.0f}}<br>UMP {years[-1]} Rp %{{customdata[1]:,.0f}}<extra></extra>"),
+                row=1, col=2
+        )
+
+        comparison_fig.update_layout(template='plotly_dark')
+        comparison_fig.update_layout(autosize=False, width=1100, height=400)
+        comparison_fig.update_layout(font=dict(family='Futura'))
+        comparison_fig.update_annotations(font_size=16, y=1.1)
+        comparison_fig.update_layout(yaxis=dict(tickformat=',.0f', tickprefix='Rp ', title='', showgrid=False),
+                                     yaxis2=dict(title='', showgrid=False, automargin=True))
+        comparison_fig.update_layout(xaxis=dict(title='Tahun', showgrid=False), xaxis2=dict(ticksuffix='%', title='', showgrid=False))
+        comparison_fig.update_layout(hovermode="x unified")
+
+        return comparison_fig
+
+## metrics the treemap can show, column -> title
+TREEMAP_METRICS = {
+        "KenaikanUMP": "Jumlah Kenaikan UMP",
+        "PersentaseKenaikan": "Persentase Kenaikan UMP",
+}
+
+def treemap_mask(values):
+        """
+        this function will return which rows a treemap shows: a positive metric, it can't draw empty or negative areas.
+        a percentage is infinite for a province without a wage the year before.
+        """
+        return np.isfinite(values) & (values > 0)
+
+def treemap_rows(store, selected_year, metric="KenaikanUMP"):
+        """
+        this function will return the provinces of a year the treemap shows.
+        """
+        dff2 = store.year(selected_year)
+        dff2 = dff2[treemap_mask(dff2[metric])]
+        ## px.treemap groups the path columns, categoricals would add every unobserved regional/province pair
+        return dff2.astype({"Regional": object, store.label: object})
+
+def treemap_note(values):
+        """
+        this function will return a note on the provinces of a year the treemap leaves out (see treemap_mask),
+        or None when it shows them all.
+        """
+        values = np.asarray(values, dtype=float)
+        counts = [
+                ((values == 0).sum(), "tanpa kenaikan"),
+                ((values < 0).sum(), "turun"),
+                ((~np.isfinite(values)).sum(), "tanpa data tahun sebelumnya"),
+        ]
+        parts = [f"{count} provinsi {reason}" for count, reason in counts if count]
+        return "Tidak ditampilkan: " + ", ".join(parts) if parts else None
+
+def treemap_title(selected_year, metric="KenaikanUMP", note=None):
+        title = f"<b>{TREEMAP_METRICS[metric]} Tahun {selected_year}<b>"
+        return f"{title}<br><sup>{note}</sup>" if note else title
+
+def build_treemap_figure(store, selected_year, metric="KenaikanUMP"):
+        """
+        this function will build the treemap of a year's minimum wage increase (or percentage increase) per regional and province.
+        """
+        import plotly.express as px
+
+
+        # ************************************************************************************************************************************************************************************
+        # -------- treemap ---------
+        # ************************************************************************************************************************************************************************************
+
+        # build dataframe
+        # filter dataframe by selected year
+        with span("filter"):
+                dff2 = treemap_rows(store, selected_year, metric)
+                note = treemap_note(store.year(selected_year)[metric])
+
+                tick_upah2, text_upah2 = treemap_colorbar_ticks(dff2[metric], metric)
+
+
+        ## build figure
+        treemap_fig = px.treemap(
+                dff2, path=[px.Constant("Indonesia"), "Regional", store.label], values=metric,
+                color=metric,color_continuous_scale='Viridis_r', hover_name=store.label,
+                hover_data=[metric]
+                )
+
+        ## update figure layout
+        treemap_fig.update_layout(
+                title=treemap_title(selected_year, metric, note),
+                title_x=0.45, title_font_size=16, title_y=0.97, 
+                )
+        treemap_fig.update_layout(margin = dict(t=50, l=0, r=25, b=15))
+        treemap_fig.update_layout(autosize=False,width=350,height=500)
+        treemap_fig.update_layout(template='plotly_dark')
+        treemap_fig.update_coloraxes(
+                colorbar_tickmode="array", colorbar_tickvals=tick_upah2,
+                colorbar_ticktext=text_upah2, colorbar_tickfont_size=12,
+                colorbar_len=0.8, colorbar_thickness=10, colorbar_orientation="h", colorbar_title=dict(text="", side="top"), 
+                colorbar_ticklabelposition="outside bottom", colorbar_y=-0.12, colorbar_x=0.5,
+                )
+        treemap_fig.update_layout(font=dict(family='Futura'))
+
+        return treemap_fig
+
+def build_treemap_aggregates(store, years=None):
+        """
+        this function will return the treemap nodes and colorbar ticks of every year (or the given years) and metric,
+        keyed by (year, metric). computed once at load time from the year-sorted arrays, so a treemap on the request path is a dict lookup.
+        """
+        names = store.by_year[store.label].to_numpy()
+        regionals = store.by_year["Regional"].to_numpy()
+        year_index = store.year_index if years is None else {year: store.year_index[year] for year in years}
+        aggregates = {}
+        for metric in TREEMAP_METRICS:
+                metric_values = store.by_year[metric].to_numpy(dtype=float)
+                for year, (start, stop) in year_index.items():
+                        rows = start + np.flatnonzero(treemap_mask(metric_values[start:stop]))
+                        tick_upah2, text_upah2 = treemap_colorbar_ticks(metric_values[rows], metric)
+                        aggregates[(int(year), metric)] = {
+                                "nodes": treemap_nodes(names[rows], regionals[rows], metric_values[rows]),
+                                "tickvals": [json_number(tick) for tick in tick_upah2], "ticktext": text_upah2,
+                                "note": treemap_note(metric_values[start:stop]),
+                        }
+        return aggregates
+
+def json_number(value):
+        """
+        this function will return a numpy number as the python value figure_to_dict would give, NaN as None.
+        """
+        value = value.item() if isinstance(value, np.generic) else value
+        return None if isinstance(value, float) and np.isnan(value) else value
+
+def mark_title(figure, selected_year, note, subtitle=None):
+        """
+        this function will return the figure with note after the year in its title, e.g. "Tahun 2024 (Proyeksi)",
+        and subtitle as a smaller second line when given.
+        only the layout and title are copied, the data is shared with the figure given.
+        """
+        title = dict(figure["layout"]["title"])
+        title["text"] = title["text"].replace(f"Tahun {selected_year}", f"Tahun {selected_year} ({note})")
+        if subtitle:
+                title["text"] += f"<br><sup>{subtitle}</sup>"
+        return dict(figure, layout=dict(figure["layout"], title=title))
+
+def with_geojson(figure, geojson_url):
+        """
+        this function will return the map figure with its geometry referenced by another url, e.g. another level of detail.
+        only the list of traces and the first trace are copied, the rest is shared with the figure given.
+        """
+        data = list(figure["data"])
+        data[0] = dict(data[0], geojson=geojson_url)
+        return dict(figure, data=data)
+
+class FigureSkeletons:
+        """
+        figures filled into prebuilt skeletons instead of being built with plotly.
+
+        the first figure of each kind is built with the plotly builders above and kept as json data. every other
+        figure of that kind is the skeleton with only its data arrays, colorbar ticks and titles replaced, which is
+        plain python and numpy: no plotly express argument processing, template or layout updates per figure.
+        the result is the same json as figure_to_dict(build_*_figure(...)).
+
+        skeleton parts are shared between the figures returned, so they must not be modified (the figure cache doesn't).
+        """
+
+        def __init__(self, store, geojson_url):
+                self.store = store
+                self.geojson_url = geojson_url
+                self.treemaps = build_treemap_aggregates(store)
+                self._skeletons = {}
+
+        def with_store(self, store):
+                """
+                this function will return skeletons that fill figures from another store (a projection, constant prices),
+                sharing the built skeletons. treemap aggregates of that store are computed per year on first use.
+                """
+                other = copy.copy(self)
+                other.store = store
+                other.treemaps = {}
+                return other
+
+        def skeleton(self, kind, metric=None):
+                if (kind, metric) not in self._skeletons:
+                        latest_year = self.store.years[-1]
+                        if kind == "map":
+                                fig = build_map_figure(self.store, latest_year, self.geojson_url)
+                        elif kind == "line":
+                                fig = build_line_figure(self.store, self.store.provinces[0])
+                        else:
+                                fig = build_treemap_figure(self.store, latest_year, metric)
+                        self._skeletons[(kind, metric)] = figure_to_dict(fig)
+                return self._skeletons[(kind, metric)]
+
+        def warm(self):
+                """
+                this function will build every skeleton up front, so later figures never import or call plotly
+                (with `gunicorn --preload` once in the master, shared copy-on-write by the workers).
+                """
+                self.skeleton("map")
+                self.skeleton("line")
+                for metric in TREEMAP_METRICS:
+                        self.skeleton("treemap", metric)
+
+        def map_figure(self, selected_year):
+                skeleton = self.skeleton("map")
+                with span("filter"):
+                        dff = self.store.year(selected_year)
+                        year = dff["Tahun"].iloc[0]
+                        tick_upah, text_upah = map_colorbar_ticks(self.store, selected_year)
+                        locations = dff[self.store.key].tolist()
+                        upah = dff["UpahMinimumProvinsi"].tolist()
+
+                trace = dict(skeleton["data"][0], customdata=[list(row) for row in zip(locations, upah)], locations=locations, z=upah)
+                return {"data": [trace], "layout": self._fill_layout(
+                        skeleton["layout"], [json_number(tick) for tick in tick_upah], text_upah,
+                        f"<b>Peta Upah Minimum Provinsi Tahun {year}</b>"
+                )}
+
+        def line_figure(self, province_name):
+                skeleton = self.skeleton("line")
+                with span("filter"):
+                        dff1 = get_province_series(self.store, province_name)
+                        x = dff1["Tahun"].tolist()
+                        y = [json_number(value) for value in dff1["KenaikanUMP"].to_numpy()]
+                        prov_name = dff1[self.store.label].iloc[0]
+
+                data = [dict(skeleton["data"][0], x=x, y=y)] + skeleton["data"][1:]
+                layout = dict(skeleton["layout"])
+                layout["annotations"] = [dict(layout["annotations"][0], text=f'<b>Jumlah Kenaikan UMP Tahunan Provinsi {prov_name}</b>')]
+                layout["annotations"] += skeleton["layout"]["annotations"][1:]
+                return {"data": data, "layout": layout}
+
+        def treemap_figure(self, selected_year, metric="KenaikanUMP"):
+                skeleton = self.skeleton("treemap", metric)
+                if (int(selected_year), metric) not in self.treemaps:
+                        self.treemaps.update(build_treemap_aggregates(self.store, [selected_year]))
+                aggregate = self.treemaps[(int(selected_year), metric)]
+                nodes = aggregate["nodes"]
+
+                trace = dict(skeleton["data"][0], **{key: values for key, values in nodes.items() if key != "colors"})
+                trace["marker"] = dict(trace["marker"], colors=nodes["colors"])
+                return {"data": [trace], "layout": self._fill_layout(
+                        skeleton["layout"], aggregate["tickvals"], aggregate["ticktext"],
+                        treemap_title(selected_year, metric, aggregate["note"])
+                )}
+
+        def _fill_layout(self, layout, tickvals, ticktext, title):
+                layout = dict(layout)
+                colorbar = dict(layout["coloraxis"]["colorbar"], tickvals=tickvals, ticktext=ticktext)
+                layout["coloraxis"] = dict(layout["coloraxis"], colorbar=colorbar)
+                layout["title"] = dict(layout["title"], text=title)
+                return layout
+
+def treemap_nodes(names, regionals, increases):
+        """
+        this function will return the treemap nodes (Indonesia / regional / province) the way px.treemap computes them
+        from the province names, their regionals and the metric values: provinces sorted by name, then regionals sorted
+        by name, then the root. a node's value is the sum of the metric below it and its color the metric average
+        weighted by that value. sums may differ from px.treemap in the last bits, export.py --verify compares them with a
+        relative tolerance.
+        """
+        values = np.where(np.isnan(increases), 0.0, increases)
+
+        def node(rows, label, node_id, parent):
+                weights = values[rows]
+                total = np.sum(weights)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                        color = np.multiply(increases[rows], weights).sum() / total
+                unique_names = set(names[rows])
+                return {
+                        "label": label, "id": node_id, "parent": parent, "value": total, "color": color,
+                        "hovertext": unique_names.pop() if len(unique_names) == 1 else "(?)",
+                }
+
+        leaves = sorted(range(len(names)), key=lambda row: (names[row], regionals[row]))
+        nodes = [node([row], names[row], f"Indonesia/{regionals[row]}/{names[row]}", f"Indonesia/{regionals[row]}") for row in leaves]
+        for regional in sorted(set(regionals)):
+                nodes.append(node(np.flatnonzero(regionals == regional), regional, f"Indonesia/{regional}", "Indonesia"))
+        if len(names):
+                nodes.append(node(np.arange(len(names)), "Indonesia", "Indonesia", ""))
+
+        colors = [json_number(item["color"]) for item in nodes]
+        return {
+                "customdata": [[color, color] for color in colors],
+                "hovertext": [item["hovertext"] for item in nodes],
+                "ids": [item["id"] for item in nodes],
+                "labels": [item["label"] for item in nodes],
+                "parents": [item["parent"] for item in nodes],
+                "values": [json_number(item["value"]) for item in nodes],
+                "colors": colors,
+        }
@@ -0,0 +1,269 @@
+"""
+geometry preparation for the choropleth map.
+
+the source geojson is simplified into several level-of-detail variants, each stored next to the original
+as data/geojson/indonesia.<level>.geojson. shared province borders are split into arcs and every arc is
+simplified once, so neighbouring provinces keep exactly the same border (no gaps or overlaps).
+
+run `python geometry.py` from the src folder to rebuild the artifacts after the source geojson changes,
+`python geometry.py <path>` builds the same levels for another geojson (e.g. regency/city borders).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+from flask import Response, request
+
+
+GEOJSON_PATH = "data/geojson/indonesia.geojson"
+
+## tolerance is the douglas-peucker distance in degrees, precision is the number of decimals kept
+## the map is rendered at 900x380 px over ~46 degrees of longitude, i.e. roughly 0.05 degree per pixel
+LEVELS_OF_DETAIL = {
+    "high": {"tolerance": 0.005, "precision": 4},
+    "medium": {"tolerance": 0.02, "precision": 3},
+    "low": {"tolerance": 0.05, "precision": 2},
+}
+
+
+def lod_path(level, source_path=GEOJSON_PATH):
+    """
+    this function will return the artifact path of a level of detail, "full" is the original file.
+    """
+    if level == "full":
+        return source_path
+    root, ext = os.path.splitext(source_path)
+    return f"{root}.{level}{ext}"
+
+
+def resolve_lod_path(level, source_path=GEOJSON_PATH):
+    """
+    this function will return the file to read for a level of detail, falling back to the original file
+    when the simplified artifact has not been built.
+    """
+    if level != "full" and level not in LEVELS_OF_DETAIL:
+        raise ValueError(f"unknown level of detail {level!r}, expected 'full' or one of {sorted(LEVELS_OF_DETAIL)}")
+    path = lod_path(level, source_path)
+    if not os.path.exists(path):
+        return source_path
+    return path
+
+
+def register_geojson_route(server, level="full", source_path=GEOJSON_PATH, max_age=31536000):
+    """
+    this function will serve the geojson for a level of detail from the flask server and return its url.
+    the url carries the content hash, so browsers can keep the file for max_age seconds and revalidate with the ETag,
+    and figures only reference the url instead of embedding the geometry in every callback response.
+    """
+    path = resolve_lod_path(level, source_path)
+    with open(path, "rb") as f:
+        content = f.read()
+    etag = hashlib.sha1(content).hexdigest()[:16]
+    filename = os.path.basename(path)
+
+    def serve_geojson():
+        response = Response(content, mimetype="application/json")
+        response.set_etag(etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+        return response.make_conditional(request)
+
+    ## one route per file, so several geometries (e.g. provinces and regencies) can be served side by side
+    server.add_url_rule(f"/geo/{filename}", endpoint=f"geojson_{filename}", view_func=serve_geojson)
+    return f"/geo/{filename}?v={etag}"
+
+
+def available_levels(source_path=GEOJSON_PATH):
+    """
+    this function will return the levels of detail that have their own file, from the lightest to "full".
+    """
+    return [level for level in (*sorted(LEVELS_OF_DETAIL, key=lambda level: -LEVELS_OF_DETAIL[level]["tolerance"]), "full")
+            if os.path.exists(lod_path(level, source_path))]
+
+
+def register_geojson_routes(server, levels, source_path=GEOJSON_PATH, max_age=31536000):
+    """
+    this function will serve several levels of detail of a geojson and return {level: url}.
+    levels falling back to the same file (artifacts not built) share its route.
+    """
+    urls_by_path = {}
+    urls = {}
+    for level in levels:
+        path = resolve_lod_path(level, source_path)
+        if path not in urls_by_path:
+            urls_by_path[path] = register_geojson_route(server, level, source_path, max_age)
+        urls[level] = urls_by_path[path]
+    return urls
+
+
+def iter_polygons(geometry):
+    if geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    return [geometry["coordinates"]]
+
+
+def quantize(geojson, precision):
+    """
+    this function will round every coordinate to the given number of decimals and drop repeated vertices.
+    """
+    rings = []
+    for feature in geojson["features"]:
+        polygons = []
+        for polygon in iter_polygons(feature["geometry"]):
+            quantized = []
+            for ring in polygon:
+                points = np.round(np.asarray(ring, dtype=float), precision)
+                keep = np.ones(len(points), dtype=bool)
+                keep[1:] = np.any(points[1:] != points[:-1], axis=1)
+                quantized.append(points[keep])
+            polygons.append(quantized)
+        rings.append(polygons)
+    return rings
+
+
+def find_junctions(features):
+    """
+    this function will return the set of vertices where a border between provinces starts or ends,
+    i.e. every vertex that has more than two distinct neighbours across all rings.
+    """
+    neighbours = {}
+    for polygons in features:
+        for polygon in polygons:
+            for ring in polygon:
+                points = [tuple(p) for p in ring]
+                n = len(points) - 1  # rings are closed, the last point repeats the first
+                for i in range(n):
+                    neighbours.setdefault(points[i], set()).update((points[i - 1], points[(i + 1) % n]))
+    return {point for point, adjacent in neighbours.items() if len(adjacent) > 2}
+
+
+def douglas_peucker(points, tolerance):
+    """
+    this function will return a boolean mask of the vertices kept by douglas-peucker, endpoints are always kept.
+    """
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[start + 1:end]
+        a, b = points[start], points[end]
+        ab = b - a
+        length = np.hypot(ab[0], ab[1])
+        if length == 0:
+            distances = np.hypot(segment[:, 0] - a[0], segment[:, 1] - a[1])
+        else:
+            distances = np.abs(ab[0] * (segment[:, 1] - a[1]) - ab[1] * (segment[:, 0] - a[0])) / length
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            split = start + 1 + index
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return keep
+
+
+def simplify_ring(ring, junctions, tolerance, arc_cache):
+    """
+    this function will simplify a closed ring arc by arc. arcs are cached in a canonical direction so the
+    same border shared by two provinces is simplified only once and stays identical on both sides.
+    """
+    points = ring[:-1]
+    cuts = [i for i, p in enumerate(points) if tuple(p) in junctions]
+    if not cuts:
+        ## an island or a ring that touches no other province, split it at its farthest vertex
+        far = int(np.argmax(np.hypot(points[:, 0] - points[0, 0], points[:, 1] - points[0, 1])))
+        cuts = [0, far] if far > 0 else [0]
+
+    ## rotate the ring so it starts at a cut, then walk the arcs between consecutive cuts
+    points = np.roll(points, -cuts[0], axis=0)
+    cuts = [c - cuts[0] for c in cuts] + [len(points)]
+    closed = np.vstack([points, points[:1]])
+
+    simplified = []
+    for start, end in zip(cuts[:-1], cuts[1:]):
+        arc = closed[start:end + 1]
+        forward = arc.tobytes()
+        backward = arc[::-1].tobytes()
+        key = min(forward, backward)
+        if key not in arc_cache:
+            canonical = arc if key == forward else arc[::-1]
+            arc_cache[key] = canonical[douglas_peucker(canonical, tolerance)]
+        result = arc_cache[key] if key == forward else arc_cache[key][::-1]
+        simplified.append(result[:-1])
+    simplified.append(closed[-1:])
+    return np.vstack(simplified)
+
+
+def simplify_geojson(geojson, tolerance, precision):
+    """
+    this function will return a simplified and quantized copy of the geojson feature collection.
+    rings smaller than the tolerance or that collapse below a triangle are dropped, but every province
+    keeps at least its largest polygon.
+    """
+    features = quantize(geojson, precision)
+    junctions = find_junctions(features)
+    arc_cache = {}
+
+    output = {"type": "FeatureCollection", "features": []}
+    for feature, polygons in zip(geojson["features"], features):
+        simplified_polygons = []
+        for polygon in polygons:
+            rings = []
+            for i, ring in enumerate(polygon):
+                extent = np.ptp(ring, axis=0).max() if len(ring) else 0
+                if len(ring) < 4 or extent < tolerance:
+                    if i == 0:
+                        break
+                    continue
+                simplified = simplify_ring(ring, junctions, tolerance, arc_cache)
+                if len(simplified) >= 4:
+                    rings.append(simplified.tolist())
+                elif i == 0:
+                    break  # exterior ring collapsed, drop the whole polygon
+            else:
+                if rings:
+                    simplified_polygons.append(rings)
+
+        if not simplified_polygons:
+            largest = max(polygons, key=lambda polygon: len(polygon[0]))
+            simplified_polygons.append([largest[0].tolist()])
+
+        output["features"].append({
+            "type": "Feature",
+            "properties": feature["properties"],
+            "geometry": {"type": "MultiPolygon", "coordinates": simplified_polygons},
+        })
+    return output
+
+
+def build_levels_of_detail(source_path=GEOJSON_PATH, levels=LEVELS_OF_DETAIL):
+    """
+    this function will write every level of detail next to the source geojson and return their file sizes.
+    """
+    with open(source_path) as f:
+        geojson = json.load(f)
+
+    sizes = {}
+    for level, params in levels.items():
+        simplified = simplify_geojson(geojson, params["tolerance"], params["precision"])
+        path = lod_path(level, source_path)
+        with open(path, "w") as f:
+            json.dump(simplified, f, separators=(",", ":"))
+        sizes[level] = os.path.getsize(path)
+    return sizes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="build the simplified levels of detail of a geojson")
+    parser.add_argument("source", nargs="?", default=GEOJSON_PATH, help=f"source geojson, default {GEOJSON_PATH}")
+    args = parser.parse_args()
+
+    print(f"{'full':>6}: {os.path.getsize(args.source):>8} bytes")
+    for level, size in build_levels_of_detail(args.source).items():
+        print(f"{level:>6}: {size:>8} bytes")
@@ -0,0 +1,165 @@
+"""
+timing spans and metrics for the hot path.
+
+    with span("map_build"):
+        fig = build_map_figure(...)
+
+every span is added to a per-process histogram, and spans recorded while serving a request are returned to the browser
+in a Server-Timing header (visible in the devtools network tab). /metrics exposes counters and histograms in the
+prometheus text format. each gunicorn worker keeps its own metrics.
+
+with INSTRUMENTATION=0 nothing is registered on the server and span() returns a shared no-op context manager.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+
+from flask import Response, g, has_request_context, request
+
+
+ENABLED = os.environ.get("INSTRUMENTATION", "1") == "1"
+
+## upper bounds of the histogram buckets, in milliseconds
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_NULL_SPAN = nullcontext()
+
+## label of requests that matched no route (404), so unknown paths don't each get their own metrics
+UNMATCHED_ROUTE = "unmatched"
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+
+class Metrics:
+    """
+    thread-safe counters and histograms, labelled by a single name.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def increment(self, metric, label, amount=1):
+        with self._lock:
+            key = (metric, label)
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, metric, label, value):
+        with self._lock:
+            key = (metric, label)
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(value)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def render(self, gauges=None):
+        """
+        this function will return every metric in the prometheus text exposition format.
+        gauges is an optional dict of (metric, label) -> value read at scrape time, e.g. cache sizes.
+        """
+        lines = []
+        with self._lock:
+            for (metric, label), value in sorted(self.counters.items()):
+                lines.append(f'{metric}{{name="{escape_label(label)}"}} {value}')
+            for (metric, label), histogram in sorted(self.histograms.items()):
+                label = escape_label(label)
+                cumulative = 0
+                for bound, count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{name="{label}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{name="{label}"}} {histogram.sum:.3f}')
+                lines.append(f'{metric}_count{{name="{label}"}} {histogram.count}')
+        for (metric, label), value in sorted((gauges or {}).items()):
+            lines.append(f'{metric}{{name="{escape_label(label)}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+def escape_label(value):
+    """
+    this function will escape a label value for the prometheus text format.
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = Metrics()
+
+
+class Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        duration_ms = (time.perf_counter() - self.start) * 1000
+        metrics.observe("ump_span_duration_ms", self.name, duration_ms)
+        if has_request_context():
+            g.setdefault("server_timing", []).append((self.name, duration_ms))
+        return False
+
+
+def span(name):
+    """
+    return a context manager that times the enclosed block as `name`.
+    """
+    if not ENABLED:
+        return _NULL_SPAN
+    return Span(name)
+
+
+def register_instrumentation(server, gauges=None):
+    """
+    this function will time every request, add the Server-Timing header and serve /metrics on the flask server.
+    gauges is an optional function returning extra values for /metrics, see Metrics.render.
+    """
+    if not ENABLED:
+        return
+
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+
+    ## first in line, so the total includes dash's own before_request work
+    server.before_request_funcs.setdefault(None, []).insert(0, start_request_timer)
+
+    @server.after_request
+    def add_server_timing(response):
+        if "request_start" not in g:
+            return response
+        total_ms = (time.perf_counter() - g.request_start) * 1000
+        ## labelled by route rule, not path: dash's catch-all route answers any url
+        route = request.url_rule.rule if request.url_rule is not None else UNMATCHED_ROUTE
+        metrics.increment("ump_requests_total", route)
+        metrics.observe("ump_request_duration_ms", route, total_ms)
+
+        entries = [f"{name};dur={duration:.2f}" for name, duration in g.get("server_timing", [])]
+        entries.append(f"total;dur={total_ms:.2f}")
+        response.headers["Server-Timing"] = ", ".join(entries)
+        return response
+
+    def serve_metrics():
+        return Response(metrics.render(gauges() if gauges else None), mimetype="text/plain; version=0.0.4")
+
+    server.add_url_rule("/metrics", endpoint="metrics", view_func=serve_metrics)
@@ -0,0 +1,141 @@
+"""
+projection of next year's minimum wage of every province under inflation / economic growth / alpha scenarios.
+
+the formula is the one of PP 51/2023:
+
+    UMP(t+1) = UMP(t) + (inflation + economic growth * alpha) * UMP(t)
+
+with inflation and growth in percent and alpha the labour contribution index (0.1 - 0.3). every parameter can be one
+value for all provinces or one value per province. many scenarios are projected at once as one (scenarios, provinces)
+array: a grid of thousands of combinations is a single broadcasted multiplication.
+
+the dashboard shows one scenario as an extra year on the map and treemap (see ProjectionEngine.store).
+run `python projection.py --inflation 2 2.5 3 --growth 4.5 5 --alpha 0.1 0.2 0.3` from the src folder to write
+every combination for every province to a csv.
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from cache import FigureCache
+from datastore import UMPStore
+from summaries import build_summaries
+
+
+## the alpha range allowed by PP 51/2023
+ALPHA_RANGE = (0.1, 0.3)
+
+PROJECTION_PATH = "data/processed/UMP-Proyeksi.csv"
+
+
+def scenario_grid(inflation, growth, alpha):
+    """
+    this function will return every combination of the given parameter values as a (scenarios, 3) array
+    of (inflation, growth, alpha), inflation varying slowest.
+    """
+    grids = np.meshgrid(np.atleast_1d(inflation), np.atleast_1d(growth), np.atleast_1d(alpha), indexing="ij")
+    return np.column_stack([grid.ravel() for grid in grids]).astype(float)
+
+
+def project_wages(base, inflation, growth, alpha):
+    """
+    this function will return the projected wages, rounded to whole rupiah, for base wages of shape (provinces,).
+    parameters broadcast against (scenarios, provinces): scalars, (scenarios, 1) columns or (provinces,) rows.
+    """
+    rate = (np.asarray(inflation, dtype=float) + np.asarray(growth, dtype=float) * np.asarray(alpha, dtype=float)) / 100
+    return np.round(np.asarray(base, dtype=float) * (1 + rate))
+
+
+class ProjectionEngine:
+    """
+    projections of the year after the last year of a store, starting from the wages of that last year.
+    """
+
+    def __init__(self, store, store_cache_size=8):
+        self.base_year = int(store.years[-1])
+        self.year = self.base_year + 1
+        self.base_rows = store.year(self.base_year)
+        self.key, self.label = store.key, store.label
+        self.provinces = [str(province_name) for province_name in self.base_rows[store.key]]
+        self.base = self.base_rows["UpahMinimumProvinsi"].to_numpy(dtype=float)
+        self._stores = FigureCache(maxsize=store_cache_size)
+
+    def project(self, scenarios):
+        """
+        this function will return the projected wages of every province for a (scenarios, 3) array of
+        (inflation, growth, alpha), as a (scenarios, provinces) array.
+        """
+        scenarios = np.asarray(scenarios, dtype=float).reshape(-1, 3)
+        return project_wages(self.base, scenarios[:, [0]], scenarios[:, [1]], scenarios[:, [2]])
+
+    def frame(self, scenario):
+        """
+        this function will return the projected year of one scenario with the columns of the prepared dataset.
+        """
+        projected = self.project([scenario])[0]
+        df = self.base_rows.copy()
+        df["Tahun"] = df["Tahun"].dtype.type(self.year)
+        df["PrevUMP"] = self.base
+        df["UpahMinimumProvinsi"] = projected.astype(df["UpahMinimumProvinsi"].dtype)
+        ## same derived columns as dataset.prepare_dataset
+        df["KenaikanUMP"] = df["UpahMinimumProvinsi"] - df["PrevUMP"]
+        df["PersentaseKenaikan"] = (((df["UpahMinimumProvinsi"] - df["PrevUMP"]) / df["PrevUMP"]) * 100).round(2)
+        df.loc[df["KenaikanUMP"] < 0, "KenaikanUMP"] = 0
+        return df.reset_index(drop=True)
+
+    def store(self, scenario):
+        """
+        this function will return a UMPStore holding only the projected year of one scenario, with its summaries,
+        so the map and treemap builders draw it like any other year. the last few are cached.
+        """
+        scenario = tuple(float(value) for value in scenario)
+
+        def build():
+            df = self.frame(scenario)
+            summaries, _ = build_summaries(df, key=self.key)
+            return UMPStore(df, key=self.key, summaries=summaries, label=self.label)
+        return self._stores.get_or_build(scenario, build)
+
+    def table(self, scenarios):
+        """
+        this function will return the projections of many scenarios as a long frame, one row per scenario and province.
+        """
+        scenarios = np.asarray(scenarios, dtype=float).reshape(-1, 3)
+        projected = self.project(scenarios)
+        n_scenarios, n_provinces = projected.shape
+        return pd.DataFrame({
+            "Skenario": np.repeat(np.arange(n_scenarios), n_provinces),
+            "Inflasi": np.repeat(scenarios[:, 0], n_provinces),
+            "PertumbuhanEkonomi": np.repeat(scenarios[:, 1], n_provinces),
+            "Alpha": np.repeat(scenarios[:, 2], n_provinces),
+            self.key: np.tile(self.provinces, n_scenarios),
+            "Tahun": self.year,
+            "UMPDasar": np.tile(self.base, n_scenarios).astype("int64"),
+            "ProyeksiUMP": projected.ravel().astype("int64"),
+        })
+
+
+if __name__ == "__main__":
+    from dataset import DATASET_PATH, load_dataset
+    from summaries import load_summaries
+
+    parser = argparse.ArgumentParser(description="project next year's minimum wage of every province for a grid of scenarios")
+    parser.add_argument("--inflation", type=float, nargs="+", required=True, help="inflation in percent, one or more values")
+    parser.add_argument("--growth", type=float, nargs="+", required=True, help="economic growth in percent, one or more values")
+    parser.add_argument("--alpha", type=float, nargs="+", default=[0.1, 0.2, 0.3], help="alpha, default 0.1 0.2 0.3")
+    parser.add_argument("--output", default=PROJECTION_PATH, help=f"csv path, default {PROJECTION_PATH}")
+    args = parser.parse_args()
+
+    df = load_dataset(DATASET_PATH)
+    engine = ProjectionEngine(UMPStore(df, summaries=load_summaries(df, DATASET_PATH)))
+    scenarios = scenario_grid(args.inflation, args.growth, args.alpha)
+
+    start = time.perf_counter()
+    table = engine.table(scenarios)
+    elapsed = time.perf_counter() - start
+    table.to_csv(args.output, index=False)
+    print(f"projected {len(scenarios)} scenarios x {len(engine.provinces)} provinces for {engine.year} "
+          f"in {elapsed * 1000:.1f} ms, wrote {args.output}")
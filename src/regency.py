@@ -0,0 +1,102 @@
+"""
+minimum wages of regencies and cities (upah minimum kabupaten/kota, UMK), shown on the map when a province is clicked.
+
+the table is a local csv, data/processed/UMK-Tingkat-Kabupaten-Kota.csv by default (see UMK_PATH in app.py), with the columns
+
+    KodeWilayah,KabupatenKota,Provinsi,Tahun,UMK
+
+one row per regency/city and year. KodeWilayah is the BPS region code (e.g. 3273 for Kota Bandung), the id the regency
+geometry carries in its REGENCY_FEATURE_KEY property. province names may use the spellings of the raw wage sources
+(see etl.PROVINCE_ALIASES). the geometry is data/geojson/indonesia-kabupaten-kota.geojson by default, its levels of
+detail are built with `python geometry.py data/geojson/indonesia-kabupaten-kota.geojson` from the src folder.
+
+the table is prepared like the provincial dataset (dataset.prepare_dataset, keyed on KodeWilayah) and split by province
+once at load time. every province gets its own UMPStore with its summaries on first use, so a drill-down map is drawn
+by the same builder and colorbar ticks as the province map.
+"""
+
+import os
+import warnings
+
+import pandas as pd
+
+from cache import FigureCache
+from dataset import prepare_dataset
+from datastore import UMPStore, build_ranges
+from etl import PROVINCE_ALIASES
+from summaries import build_summaries
+
+
+UMK_PATH = "data/processed/UMK-Tingkat-Kabupaten-Kota.csv"
+REGENCY_GEOJSON_PATH = "data/geojson/indonesia-kabupaten-kota.geojson"
+REGENCY_FEATURE_KEY = "properties.kode"
+
+## the region key and display name columns of the regency stores
+REGENCY_KEY = "KodeWilayah"
+REGENCY_LABEL = "KabupatenKota"
+
+
+class MissingRegencyWarning(UserWarning):
+    """
+    raised (as a warning) when the regency table or its geometry can't be used and the map stays provincial.
+    """
+
+
+def load_regencies(path=UMK_PATH, geojson_path=REGENCY_GEOJSON_PATH):
+    """
+    this function will return the prepared regency table, or None when there is no table.
+    a table that can't be used, or one without its geometry, gives None with a MissingRegencyWarning.
+    """
+    if not os.path.exists(path):
+        return None
+    if not os.path.exists(geojson_path):
+        warnings.warn(f"{path} has no geometry at {geojson_path}, the map stays provincial",
+                      MissingRegencyWarning, stacklevel=2)
+        return None
+
+    regencies = pd.read_csv(path, dtype={REGENCY_KEY: str})
+    missing = {REGENCY_KEY, REGENCY_LABEL, "Provinsi", "Tahun", "UMK"} - set(regencies.columns)
+    if missing:
+        warnings.warn(f"{path} has no column {sorted(missing)}, the map stays provincial",
+                      MissingRegencyWarning, stacklevel=2)
+        return None
+
+    ## the chart builders and summaries read the wage from UpahMinimumProvinsi, whatever the level
+    regencies = regencies[[REGENCY_KEY, REGENCY_LABEL, "Provinsi", "Tahun", "UMK"]].dropna()
+    regencies = regencies.rename(columns={"UMK": "UpahMinimumProvinsi"})
+    regencies[REGENCY_KEY] = regencies[REGENCY_KEY].str.strip()
+    regencies["Provinsi"] = regencies["Provinsi"].astype(str).str.strip().replace(PROVINCE_ALIASES)
+    regencies = regencies.drop_duplicates(subset=[REGENCY_KEY, "Tahun"], keep="last")
+
+    df = prepare_dataset(regencies, key=REGENCY_KEY)
+    df[REGENCY_KEY] = pd.Categorical(df[REGENCY_KEY])
+    df[REGENCY_LABEL] = pd.Categorical(df[REGENCY_LABEL].astype(str))
+    return df
+
+
+class RegencyWages:
+    """
+    the regency table split by province, one UMPStore (with its summaries) per province, built on first use.
+    """
+
+    def __init__(self, df):
+        self.df = df.sort_values(by=["Provinsi", REGENCY_KEY, "Tahun"]).reset_index(drop=True)
+        self.province_index = build_ranges(self.df["Provinsi"].astype(str).to_numpy())
+        self.provinces = list(self.province_index)
+        self._stores = FigureCache(maxsize=max(len(self.provinces), 1))
+
+    def __contains__(self, province_name):
+        return province_name in self.province_index
+
+    def store(self, province_name):
+        """
+        this function will return the store of the regencies of one province.
+        """
+        def build():
+            start, stop = self.province_index[province_name]
+            df = self.df.iloc[start:stop].copy()
+            for column in df.select_dtypes("category"):
+                df[column] = df[column].cat.remove_unused_categories()
+            summaries, _ = build_summaries(df, key=REGENCY_KEY)
+            return UMPStore(df, key=REGENCY_KEY, summaries=summaries, label=REGENCY_LABEL)
+        return self._stores.get_or_build(province_name, build)
@@ -0,0 +1,184 @@
+"""
+per-year summary statistics of the minimum wage dataset, nationally and per regional.
+
+every (column, scope, year) gets count, mean, std, min, p25, median, p75, max and the spreads range (max - min) and
+iqr (p75 - p25), over the provinces with a finite value. scopes are "Indonesia" followed by the regionals. everything
+is one float64 array of shape (columns, scopes, years, statistics), written by etl.py next to the dataset as
+<name>.summaries.npy plus <name>.summaries.meta.json, like the dataset artifact (see dataset.write_artifact).
+
+the meta file keeps a hash of the rows of every year. rebuilding against a previous version only computes the years
+whose rows changed, so appending a year computes that year and copies the others.
+"""
+
+import hashlib
+import json
+import os
+import warnings
+
+import numpy as np
+
+from dataset import DATASET_PATH, StaleArtifactWarning
+from datastore import build_ranges
+
+
+## bump when the statistics or how they are computed change
+SUMMARIES_VERSION = 1
+
+NATIONAL = "Indonesia"
+SUMMARY_COLUMNS = ["UpahMinimumProvinsi", "KenaikanUMP", "PersentaseKenaikan"]
+STATISTICS = ["count", "mean", "std", "min", "p25", "median", "p75", "max", "range", "iqr"]
+
+## min and max of these columns are values of the column, they are returned as ints
+INTEGER_COLUMNS = {"UpahMinimumProvinsi"}
+
+
+def summarize(values):
+    """
+    this function will return the STATISTICS of the finite values of an array, NaN (count 0) when there are none.
+    """
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return [0] + [np.nan] * (len(STATISTICS) - 1)
+    low, high = np.min(values), np.max(values)
+    p25, p75 = np.percentile(values, [25, 75])
+    return [len(values), values.mean(), values.std(), low, p25, np.median(values), p75, high, high - low, p75 - p25]
+
+
+def year_hash(provinces, regionals, columns):
+    digest = hashlib.sha1()
+    digest.update("\0".join(map(str, provinces)).encode())
+    digest.update("\0".join(map(str, regionals)).encode())
+    for values in columns:
+        digest.update(np.ascontiguousarray(values, dtype=float).tobytes())
+    return digest.hexdigest()[:16]
+
+
+class YearlySummaries:
+    """
+    read access to the summary array. years, scopes, columns and statistics are looked up through dict indexes.
+    """
+
+    def __init__(self, values, years, scopes, year_hashes):
+        self.values = values
+        self.years = list(years)
+        self.scopes = list(scopes)
+        self.year_hashes = dict(year_hashes)
+        self.year_index = {year: position for position, year in enumerate(self.years)}
+        self.scope_index = {scope: position for position, scope in enumerate(self.scopes)}
+        self.column_index = {column: position for position, column in enumerate(SUMMARY_COLUMNS)}
+        self.stat_index = {stat: position for position, stat in enumerate(STATISTICS)}
+
+    def _value(self, column, stat, value):
+        if stat == "count" or (column in INTEGER_COLUMNS and stat in ("min", "max", "range") and not np.isnan(value)):
+            return int(value)
+        return float(value)
+
+    def get(self, year, column, stats, scope=NATIONAL):
+        """
+        this function will return the statistics of one year, column and scope, in the order of stats.
+        """
+        row = self.values[self.column_index[column], self.scope_index[scope], self.year_index[year]]
+        return [self._value(column, stat, row[self.stat_index[stat]]) for stat in stats]
+
+    def series(self, column, stat, scope=NATIONAL):
+        """
+        this function will return (years, values) of one statistic for every year, as numpy arrays.
+        """
+        return np.array(self.years), self.values[self.column_index[column], self.scope_index[scope], :, self.stat_index[stat]]
+
+    def year(self, year, column, scope=NATIONAL):
+        """
+        this function will return every statistic of one year, column and scope as a dict, missing values as None.
+        """
+        values = self.get(year, column, STATISTICS, scope)
+        return {stat: None if isinstance(value, float) and np.isnan(value) else value for stat, value in zip(STATISTICS, values)}
+
+
+def build_summaries(df, previous=None, key="Provinsi"):
+    """
+    this function will compute the summaries of a prepared dataset, reusing the years of previous whose rows didn't change.
+    key is the column naming the region, like UMPStore's. returns (summaries, years that were computed).
+    """
+    df = df.sort_values(by=["Tahun", key])
+    years = df["Tahun"].to_numpy()
+    provinces = df[key].to_numpy()
+    regionals = df["Regional"].to_numpy()
+    columns = [df[column].to_numpy(dtype=float) for column in SUMMARY_COLUMNS]
+    scopes = [NATIONAL] + sorted(set(regionals))
+
+    reusable = previous is not None and previous.scopes == scopes
+    ranges = build_ranges(years)
+    values = np.full((len(SUMMARY_COLUMNS), len(scopes), len(ranges), len(STATISTICS)), np.nan)
+    hashes, computed = {}, []
+    for position, (year, (start, stop)) in enumerate(ranges.items()):
+        year_regionals = regionals[start:stop]
+        year_columns = [column[start:stop] for column in columns]
+        hashes[year] = year_hash(provinces[start:stop], year_regionals, year_columns)
+
+        if reusable and previous.year_hashes.get(year) == hashes[year]:
+            values[:, :, position] = previous.values[:, :, previous.year_index[year]]
+            continue
+
+        computed.append(year)
+        for column_position, column_values in enumerate(year_columns):
+            for scope_position, scope in enumerate(scopes):
+                selected = column_values if scope == NATIONAL else column_values[year_regionals == scope]
+                values[column_position, scope_position, position] = summarize(selected)
+
+    return YearlySummaries(values, list(ranges), scopes, hashes), computed
+
+
+def summaries_paths(csv_path=DATASET_PATH):
+    root = os.path.splitext(csv_path)[0]
+    return f"{root}.summaries.npy", f"{root}.summaries.meta.json"
+
+
+def write_summaries(summaries, csv_path=DATASET_PATH):
+    values_path, meta_path = summaries_paths(csv_path)
+    np.save(values_path, summaries.values, allow_pickle=False)
+    meta = {
+        "version": SUMMARIES_VERSION, "columns": SUMMARY_COLUMNS, "statistics": STATISTICS,
+        "years": summaries.years, "scopes": summaries.scopes,
+        "year_hashes": {str(year): digest for year, digest in summaries.year_hashes.items()},
+    }
+    with open(meta_path, "w") as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+
+
+def read_summaries(csv_path=DATASET_PATH):
+    """
+    this function will return the summaries written by etl.py, or None when they are missing or from another version.
+    """
+    values_path, meta_path = summaries_paths(csv_path)
+    if not (os.path.exists(values_path) and os.path.exists(meta_path)):
+        return None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if (meta.get("version"), meta.get("columns"), meta.get("statistics")) != (SUMMARIES_VERSION, SUMMARY_COLUMNS, STATISTICS):
+        return None
+    year_hashes = {int(year): digest for year, digest in meta["year_hashes"].items()}
+    return YearlySummaries(np.load(values_path, allow_pickle=False), meta["years"], meta["scopes"], year_hashes)
+
+
+def update_summaries(df, csv_path=DATASET_PATH):
+    """
+    this function will bring the summaries file up to date with a prepared dataset, computing only changed years.
+    returns (summaries, years that were computed).
+    """
+    previous = read_summaries(csv_path)
+    summaries, computed = build_summaries(df, previous)
+    if previous is None or computed or previous.years != summaries.years:
+        write_summaries(summaries, csv_path)
+    return summaries, computed
+
+
+def load_summaries(df, csv_path=DATASET_PATH):
+    """
+    this function will return the summaries of the dataset the dashboard loaded, from the file when it is up to date.
+    years that changed since etl.py wrote it are recomputed in memory, with a StaleArtifactWarning.
+    """
+    summaries, computed = build_summaries(df, read_summaries(csv_path))
+    if computed:
+        warnings.warn(f"summaries of {computed} were computed at startup, run `python etl.py` to store them",
+                      StaleArtifactWarning, stacklevel=2)
+    return summaries